@@ -5,16 +5,56 @@
 # ------------------------------------- #
 
 # native modules
+import io
 import os
+import re
+import bz2
 import sys
-
+import gzip
+import json
+import lzma
+import mmap
+import codecs
+import pickle
+import shutil
+import tempfile
+
+from math import ceil
+from queue import Full
+from queue import Empty
+from queue import Queue
+from threading import Event
+from threading import Thread
+from threading import get_ident
+from contextlib import contextmanager
+from math import nextafter
+from hashlib import sha1
+from functools import partial
+from functools import lru_cache
 from time import perf_counter
+from time import process_time
+from time import thread_time
+from heapq import heappush
+from heapq import heappushpop
+from heapq import nsmallest
+from collections import deque
+from itertools import chain
 from difflib import SequenceMatcher
-from difflib import get_close_matches
+from argparse import ArgumentParser
+
+# re's own pattern parser, used to find the literals required by a regex
+try:
+    from re import _parser as regex_parser      # Python 3.11+
+    from re import _constants as regex_opcodes
+except ImportError:
+    import sre_parse as regex_parser
+    import sre_constants as regex_opcodes
 
 from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 from multiprocessing import freeze_support
 from multiprocessing import set_start_method
+from multiprocessing import parent_process
 
 # ----------------------- #
 # COREUTILS CUSTOM MODULE #
@@ -35,12 +75,17 @@ from coreutils import write_settings
 from coreutils import write_crashlog
 
 # Processors allocation
+from coreutils import read_ahead
+from coreutils import InlinePool
+from coreutils import bounded_imap
+from coreutils import advise_willneed
 from coreutils import ZeroThreadError
 from coreutils import thread_allocator
 from coreutils import TooManyThreadError
 from coreutils import ThreadAllocatorArgumentError
 
 # Path traversal & manipulation
+from coreutils import walk_files
 from coreutils import change_target
 from coreutils import bash_prompt_dir
 from coreutils import PathSeparatorError
@@ -58,72 +103,1664 @@ from coreutils import validate_ls_args
 VERSION = 1.0
 PROGRAM = 'SearTxT'
 
+INDEX_VERSION = 1
+CACHE_VERSION = 2
+INDEX_GRAM_SIZE = 3
+
+# Maximum number of in-flight tasks per worker (see bounded_imap)
+TASKS_PER_WORKER = 4
+
+# Number of threads asking the OS to read the upcoming files in advance (see read_ahead)
+READ_AHEAD_THREADS = 4
+
+# Size of the windows lowercased at once by the mmap engine
+MMAP_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Size of the blocks read at once by the line engine
+READ_BLOCK_SIZE = 1024 * 1024
+
+# The encodings tried (in that order) on every file. latin-1 decodes anything, so it must come last
+CANDIDATE_ENCODINGS = ('utf8', 'cp1252', 'latin-1')
+
+# Number of bytes read from the beginning of a file to guess its encoding
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# Compressed text files are decompressed on the fly while being searched
+COMPRESSED_OPENERS = {'.txt.gz' : gzip.open, '.txt.bz2' : bz2.open, '.txt.xz' : lzma.open}
+SEARCHED_EXTENSIONS = ('.txt',) + tuple(COMPRESSED_OPENERS)
+
+# Size and number of the compressed blocks read ahead while the current ones are decompressed
+COMPRESSED_BLOCK_SIZE = 256 * 1024
+COMPRESSED_READ_AHEAD = 4
+
+# Number of distinct vocabulary words scored by a single task
+VOCABULARY_BATCH = 2000
+
+# Length of the q-grams used to discard hopeless words before difflib scores them
+QGRAM_SIZE = 2
+
+# Number of slowest files listed by /stats
+SLOWEST_FILES = 10
+
+# Length of the longest bar of the /count histogram
+HISTOGRAM_WIDTH = 40
+
+# The escape sequences of the terminal colors (stripped from the summaries of plain output)
+TERMINAL_COLORS = re.compile('\033\\[[0-9;]*m')
+
+# Files larger than SPLIT_THRESHOLD are searched as SPLIT_SIZE byte ranges by several workers
+SPLIT_THRESHOLD = 64 * 1024 * 1024
+SPLIT_SIZE = 16 * 1024 * 1024
+
+# Where the searches can run: in the main process, on a thread pool or on the worker pool
+EXECUTOR_STRATEGIES = ('inline', 'threads', 'processes')
+CALIBRATION_VERSION = 3
+CALIBRATION_COSTS = ('startup', 'file_cost', 'byte_cost')
+
+# The (files, bytes per file) of the synthetic corpora timed by the executor calibration
+CALIBRATION_CORPORA = ((256, 1024), (4, 4 * 1024 * 1024))
+
+# At most that many files are walked in advance to pick the execution strategy (see select_executor)
+EXECUTOR_PEEK_FILES = 1024
+
+# The cost of a searched byte relative to the exact line searcher (measured with benchmark.py)
+SEARCHER_COSTS = {'exact' : 1.0, 'mmap' : 0.3, 'regex' : 0.3, 'multi' : 6.5, 'approx' : 8.5}
+
 COMMANDS = (
     'Usage: /command <required parameters> [optional parameters]',
     '  or:  <search query>\n',
     '/cd [path]          : change the search directory to another directory',
     '/ls [column] [dir]  : list all items in the specified directory',
-    '/mt [method]        : search for approximate or exact matches',
+    '/mt [method]        : search for approximate, exact, multi-pattern exact or regex matches',
     '/c                  : refresh the display',
+    '/ca [size]          : limit the size of the search result cache (in MB) or clear it',
+    '/count [option]     : only count the matching lines of every file (printed as a histogram)',
     '/h                  : print out all available commands',
+    '/en [engine]        : read files line by line or memory-map them (exact match)',
+    '/ex [executor]      : run searches inline, on threads or on processes (chosen automatically by default)',
+    '/ix [option]        : enable, disable or rebuild the search indexes',
+    '/limit [number]     : stop searching after a number of results (0 removes the limit, -l only prints file names)',
     '/q                  : exit the program',
+    '/r [option]         : enable or disable searching inside sub-directories',
     '/s [score]          : set the minimum score of the approximate searcher results',
-    '/t [thread]         : allocate a number of cpu threads to the searching process\n'
+    '/stats [last]       : print a detailed report of the last search (workers, slowest files)',
+    '/t [thread]         : allocate a number of cpu threads to the searching process',
+    '/top [number]       : only print the best approximate matches (0 prints all of them)\n'
 )
 
 # -------------------------- #
 # SEARTXT-SPECIFIC FUNCTIONS #
 # -------------------------- #
 
+def format_hit(file_name, line_number, line, score=None, plain=False, patterns=()):
+    """
+    Return the printable form of a single search result.
+
+    Keyword arguments:
+    * file_name (str)       --  the path of the file relative to the search directory
+    * line_number (int)     --  the line of the result
+    * line (str)            --  the (stripped) content of that line
+    * score (float or None) --  the confidence score of approximate matches
+    * plain (bool)          --  grep-like 'file:line:[score:][patterns:]content' without colors
+                                (used when the output is piped to another program)
+    * patterns (tuple)      --  the patterns found in the line (multi-pattern matches)
+    """
+    if plain:
+        if patterns:
+            return f"{file_name}:{line_number}:{','.join(patterns)}:{line}\n"
+        if score is None:
+            return f"{file_name}:{line_number}:{line}\n"
+        return f"{file_name}:{line_number}:{score:.5f}:{line}\n"
+    if patterns:
+        return (f"{Tips.SUCCESS} {len(patterns)} pattern(s) at {Colors.BLUE}Line({line_number}){Colors.RESET} of {Colors.BLUE}{file_name}{Colors.RESET}: "
+                f"{Colors.YELLOW}{', '.join(patterns)}{Colors.RESET}\n"
+                f"{Colors.GREEN}||{Colors.RESET} {line}\n")
+    if score is None:
+        return (f"{Tips.SUCCESS} 1 match at {Colors.BLUE}Line({line_number}){Colors.RESET} of {Colors.BLUE}{file_name}{Colors.RESET}\n"
+                f"{Colors.GREEN}||{Colors.RESET} {line}\n")
+    return (f"{Tips.UNSURE1} 1 potential match at {Colors.BLUE}Line({line_number}){Colors.RESET} of {Colors.BLUE}{file_name}{Colors.RESET}\n"
+            f"{Tips.UNSURE2} {line}\n"
+            f"{Tips.UNSURE2} confidence: {Colors.YELLOW}{score:.5f}{Colors.RESET}\n")
+
+
+def json_hit(query, file_name, line_number, line, score=None, patterns=()):
+    """Return a search result as a single line of JSON (see format_hit)."""
+    hit = {'query' : query, 'file' : file_name, 'line' : line_number, 'text' : line, 'score' : score}
+    if patterns:
+        hit['patterns'] = list(patterns)
+    return json.dumps(hit, ensure_ascii=False) + '\n'
+
+
+def format_file(file_name, plain=False):
+    """Return the printable form of a file with matches (files-with-matches mode, like grep -l)."""
+    if plain:
+        return file_name
+    return f"{Tips.SUCCESS} Matches in {Colors.BLUE}{file_name}{Colors.RESET}"
+
+
+def json_error(query, message):
+    """Return the error of a query as a single line of JSON, in place of its results & summary."""
+    return json.dumps({'query' : query, 'error' : message}, ensure_ascii=False)
+
+
+def json_file(query, file_name):
+    """Return a file with matches as a single line of JSON (see format_file)."""
+    return json.dumps({'query' : query, 'file' : file_name}, ensure_ascii=False)
+
+
+def format_count(file_name, count, largest, plain=False):
+    """
+    Return a single row of the count histogram (count-only mode).
+
+    Keyword arguments:
+    * file_name (str)  --  the path of the file relative to the search directory
+    * count (int)      --  the number of matching lines of that file
+    * largest (int)    --  the largest count of the histogram (the bars are scaled to it)
+    * plain (bool)     --  grep -c like 'file:count' without colors nor bars
+    """
+    if plain:
+        return f"{file_name}:{count}"
+    bar = '#' * max(1, round(count / largest * HISTOGRAM_WIDTH))
+    return f"{Colors.CYAN}{count:>{len(str(largest))}}{Colors.RESET} {bar:<{HISTOGRAM_WIDTH}} {Colors.BLUE}{file_name}{Colors.RESET}"
+
+
+def uncolored(text):
+    """Remove the terminal colors (see coreutils.Colors) from text."""
+    return TERMINAL_COLORS.sub('', text)
+
+
+def json_count(query, file_name, count):
+    """Return the count of a file as a single line of JSON (see format_count)."""
+    return json.dumps({'query' : query, 'file' : file_name, 'count' : count}, ensure_ascii=False)
+
+
+@lru_cache(maxsize=65536)
+def cached_encoding(file_dir, size, mtime_ns):
+    """Return the first candidate encoding able to decode the beginning of a file (see guess_encoding)."""
+    with open_searched(file_dir) as sampled_file:
+        sample = sampled_file.read(ENCODING_SAMPLE_SIZE)
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            # An incremental decoder doesn't choke on a character cut in half by the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CANDIDATE_ENCODINGS[-1]
+
+
+def guess_encoding(file_dir):
+    """Guess the encoding of a file. Every worker remembers its guesses until the file is modified."""
+    stat = os.stat(file_dir)
+    return cached_encoding(file_dir, stat.st_size, stat.st_mtime_ns)
+
+
+def decode_line(raw_line, encoding):
+    """
+    Decode a line of a file of the given (guessed) encoding.
+
+    UTF-8 is always tried first: other encodings hardly ever produce valid UTF-8, and
+    the lines of a UTF-8 file with a few stray Latin-1 lines must not be garbled.
+    """
+    for candidate in ('utf8', encoding) + CANDIDATE_ENCODINGS:
+        try:
+            return raw_line.decode(candidate)
+        except UnicodeDecodeError:
+            continue
+    return raw_line.decode(CANDIDATE_ENCODINGS[-1])
+
+
+def read_lines(file_dir, start=0, end=None):
+    """
+    Yield the decoded lines of a file (see guess_encoding), split on \\n only.
+    Compressed files are decompressed on the fly (see open_searched).
+
+    If end is given, only the lines inside the byte range [start, end) are read.
+    The range must be newline-aligned (see plan_ranges).
+    """
+    encoding = guess_encoding(file_dir)
+    with open_searched(file_dir) as searched_file:
+        if start:
+            searched_file.seek(start)
+        position = start
+        for raw_line in searched_file:
+            if end is not None and position >= end:
+                break
+            position += len(raw_line)
+            yield decode_line(raw_line, encoding)
+
+
+def line_blocks(file_dir, start=0, end=None):
+    """
+    Yield a file (or a newline-aligned byte range of it) as blocks of whole lines of roughly
+    READ_BLOCK_SIZE bytes. Only the very last block may end without a newline.
+    Compressed files are decompressed on the fly (see open_searched).
+
+    Return values:
+    * a generator of (buffer, size) pairs, only buffer[:size] belongs to the block
+    """
+    remaining = float('inf') if end is None else end - start
+    leftover = b''
+    with open_searched(file_dir) as searched_file:
+        if start:
+            searched_file.seek(start)
+        while True:
+            block = searched_file.read(int(min(READ_BLOCK_SIZE, remaining)))
+            remaining -= len(block)
+            buffer = leftover + block
+            if not block:
+                if buffer:
+                    yield buffer, len(buffer)
+                return
+            # The last partial line is kept for the next block
+            cut = buffer.rfind(b'\n') + 1
+            leftover = buffer[cut:]
+            if cut:
+                yield buffer, cut
+
+
+def exact_hits(file_dir, query, start=0, end=None, line_finder=None, max_hits=0):
+    """
+    Find the exact (case-insensitive) matches inside a file or a byte range of it.
+
+    The file is read as raw bytes, a block of whole lines at a time (see line_blocks), and searched
+    for the query encoded in every candidate encoding at once (see caseless_pattern). Only the
+    matching lines are decoded, so files that aren't valid UTF-8 are searched just as fast.
+    The matching lines are found by line_finder(buffer, start, end, query) (default: caseless_lines).
+    With max_hits, the file is only read until that many hits were found.
+
+    Return values:
+    * hits (list)       --  [(line number counted from start, stripped line, None)]
+    * line_count (int)  --  the number of lines that were read
+    """
+    line_finder = line_finder or caseless_lines
+    hits = []
+    line_count = 0
+    last_byte = b''
+    for buffer, size in line_blocks(file_dir, start, end):
+        line_count += buffer_hits(buffer, 0, size, query, file_dir, hits, line_count + 1, line_finder, max_hits)
+        if max_hits and len(hits) >= max_hits:
+            return hits, line_count
+        last_byte = buffer[size - 1:size]
+    # Unlike the mmap engine, a last line without a newline is counted as well
+    return hits, line_count + (last_byte not in (b'', b'\n'))
+
+
+def count_hits(searcher, file_dir, query, close_match_cutoff=0.0, start=0, end=None):
+    """
+    Count the hits of a file or a byte range of it, like grep -c, without ever building them.
+
+    Exact searches (and regex searches with a required literal) count the matching lines
+    straight from the raw bytes (see line_blocks), so nothing is decoded except the candidate
+    lines of non-ASCII queries. The other searchers have to decode every line anyway.
+
+    Return values:
+    * count (int)       --  the number of matching lines
+    * line_count (int)  --  the number of lines that were read
+    """
+    if searcher in ('exact', 'mmap') or (searcher == 'regex' and regex_anchor(query)):
+        line_finder = regex_lines if searcher == 'regex' else caseless_lines
+        count = 0
+        line_count = 0
+        last_byte = b''
+        for buffer, size in line_blocks(file_dir, start, end):
+            count += sum(1 for _ in line_finder(buffer, 0, size, query))
+            line_count += count_newlines(buffer, 0, size)
+            last_byte = buffer[size - 1:size]
+        return count, line_count + (last_byte not in (b'', b'\n'))
+
+    if searcher == 'approx':
+        hits, line_count = approximate_hits(file_dir, query, close_match_cutoff, start, end)
+    elif searcher == 'multi':
+        hits, line_count = multi_hits(file_dir, tuple(query.split('\n')), start, end)
+    else:
+        hits, line_count = regex_hits(file_dir, query, start, end)
+    return len(hits), line_count
+
+
+def qgram_prefilter(query, close_match_cutoff, q=QGRAM_SIZE):
+    """
+    Build a predicate that discards words which can never reach close_match_cutoff.
+
+    difflib's ratio is 2 * M / (len(query) + len(word)), where M is the size of a common
+    subsequence. A ratio >= cutoff therefore bounds the number of insertions & deletions
+    needed to turn the word into the query, and by the q-gram lemma every such edit can
+    destroy at most q of the q-grams they share. Words sharing fewer q-grams than
+    max(len) - q + 1 - q * edits can't pass get_close_matches(), so skipping them
+    never changes its result.
+
+    Keyword arguments:
+    * query (str)                --  the (lowercased) search query
+    * close_match_cutoff (float) --  the minimum score of the approximate matches
+    * q (int)                    --  the q-gram length
+
+    Return values:
+    * passes (callable)  --  passes(word) is False only for words that can't reach the cutoff
+    """
+    query_length = len(query)
+    query_grams = {query[i:i + q] for i in range(query_length - q + 1)}
+    thresholds = {}
+
+    def minimum_shared_grams(word_length):
+        total_length = query_length + word_length
+        # the smallest number of matching characters for which difflib's ratio reaches the cutoff
+        matches = ceil(close_match_cutoff * total_length / 2)
+        while matches > 0 and 2.0 * (matches - 1) / total_length >= close_match_cutoff:
+            matches -= 1
+        while 2.0 * matches / total_length < close_match_cutoff:
+            matches += 1
+        if matches > min(query_length, word_length):
+            return None
+        edits = total_length - 2 * matches
+        return max(query_length, word_length) - q + 1 - q * edits
+
+    def passes(word):
+        word_length = len(word)
+        if word_length not in thresholds:
+            thresholds[word_length] = minimum_shared_grams(word_length)
+        threshold = thresholds[word_length]
+        if threshold is None:
+            return False
+        shared = 0
+        for i in range(word_length - q + 1):
+            if shared >= threshold:
+                break
+            if word[i:i + q] in query_grams:
+                shared += 1
+        return shared >= threshold
+
+    return passes
+
+
+def close_match_ratio(matcher, word, close_match_cutoff):
+    """
+    Score a single word the same way get_close_matches() does.
+
+    Keyword arguments:
+    * matcher (SequenceMatcher)  --  a matcher whose second sequence is the lowercased query
+    * word (str)                 --  the word to be scored
+    * close_match_cutoff (float) --  the minimum score of the approximate matches
+
+    Return values:
+    * ratio (float)  --  if the word reached the cutoff
+    * None           --  otherwise
+    """
+    matcher.set_seq1(word)
+    if matcher.real_quick_ratio() < close_match_cutoff or matcher.quick_ratio() < close_match_cutoff:
+        return None
+    ratio = matcher.ratio()
+    return ratio if ratio >= close_match_cutoff else None
+
+
+def closest_word(matcher, words, close_match_cutoff):
+    """
+    Equivalent of get_close_matches(query, words, 1, cutoff) that reuses the same matcher
+    (and therefore the same query junk tables) for every line.
+
+    Return values:
+    * (ratio, word)  --  the best word, ties being broken like get_close_matches()
+    * None           --  if no word reached the cutoff
+    """
+    best_match = None
+    for word in words:
+        ratio = close_match_ratio(matcher, word, close_match_cutoff)
+        if ratio is not None and (best_match is None or (ratio, word) > best_match):
+            best_match = (ratio, word)
+    return best_match
+
+
+def approximate_hits(file_dir, query, close_match_cutoff, start=0, end=None, top_results=0, max_hits=0):
+    """
+    Find the approximate matches inside a file or a byte range of it.
+    Without top_results, the file is only read until max_hits hits were found (0: read all of it).
+
+    If top_results is given, only the best top_results lines are kept in a bounded heap.
+    Once the heap is full, the cutoff is raised to its worst ratio, so that words that
+    can't make it into the heap anymore are discarded by the q-gram prefilter and the
+    cheap difflib ratios without ever being fully scored.
+
+    Return values:
+    * hits (list)       --  [(line number counted from start, stripped line, confidence score)]
+                            with top_results, every hit also ends with the ratio used for ranking
+                            (the confidence score itself ignores the letter case of the words only)
+    * line_count (int)  --  the number of lines that were read
+    """
+    hits = []
+    line_count = 0
+    lowered_query = query.lower()
+    matcher = SequenceMatcher()
+    matcher.set_seq2(lowered_query)
+    passes = qgram_prefilter(lowered_query, close_match_cutoff)
+    for line_count, line in enumerate(read_lines(file_dir, start, end), start=1):
+        words = [word for word in line.lower().split() if passes(word)]
+        if not words:
+            continue
+        match = closest_word(matcher, words, close_match_cutoff)
+        if match is None:
+            continue
+        ratio, word = match
+        score = SequenceMatcher(None, query, word).ratio()
+        if not top_results:
+            hits.append((line_count, line.strip(), score))
+            if max_hits and len(hits) >= max_hits:
+                break
+            continue
+
+        # Earlier lines win ties, hence the negative line numbers
+        if len(hits) < top_results:
+            heappush(hits, (ratio, -line_count, line.strip(), score))
+        elif (ratio, -line_count) > hits[0][:2]:
+            heappushpop(hits, (ratio, -line_count, line.strip(), score))
+        if len(hits) == top_results and hits[0][0] >= close_match_cutoff:
+            if hits[0][0] >= 1:
+                break  # even a perfect match would lose the tie to an earlier line
+            # Later lines must beat the worst kept ratio (ties are lost), so the cutoff sits just above it
+            close_match_cutoff = nextafter(hits[0][0], 2)
+            passes = qgram_prefilter(lowered_query, close_match_cutoff)
+
+    if top_results:
+        hits = sorted((-line_number, line, score, ratio) for ratio, line_number, line, score in hits)
+    return hits, line_count
+
+
 def exact_search(args):
+    """
+    Search a single file for exact (case-insensitive) matches.
+
+    Keyword arguments:
+    1. file_name   --  the name of the file to be searched
+    2. query       --  the user's search query
+    3. search_dir  --  the full path to the search directory
+    4. max_hits    --  (optional) stop reading the file after that many hits
+
+    Return values: (shared by every search task, see parse_search_results)
+    * file_name (str)   --  the name of the searched file
+    * part (None)       --  the position of the byte range (None for whole files, see range_search)
+    * line_count (int)  --  the number of lines that were read
+    * hits (list)       --  [(line number, stripped line, score or None)]
+    """
     args = tuple(args.split(SEPARATOR))
-    found = 0
-    search_output = ''
-
     file_name = args[0]
     query = args[1]
     search_dir = args[2]
+    max_hits = int(args[3]) if len(args) > 3 else 0
 
-    if not file_name.endswith('.txt'):
-        return search_output, found
+    if not file_name.endswith(SEARCHED_EXTENSIONS):
+        return file_name, None, 0, []
 
     file_dir = os.path.join(search_dir, file_name)
-    with open(file_dir, 'r', encoding='utf8') as searched_file:
-        for index, line in enumerate(searched_file, start=1):
-            if query.lower() not in line.lower():
-                continue
-            search_output = ''.join((search_output, f"{Tips.SUCCESS} 1 match at {Colors.BLUE}Line({index}){Colors.RESET} of {Colors.BLUE}{file_name}{Colors.RESET}\n"))
-            search_output = ''.join((search_output, f"{Colors.GREEN}||{Colors.RESET} {line.strip()}\n"))
-            found += 1
-    return search_output, found 
+    hits, line_count = exact_hits(file_dir, query, max_hits=max_hits)
+    return file_name, None, line_count, hits
 
 
 def approximate_search(args):
+    """
+    Search a single file for approximate matches.
+
+    Keyword arguments:
+    1. file_name   --  the name of the file to be searched
+    2. query       --  the user's search query
+    3. search_dir  --  the full path to the search directory
+    4. score       --  the minimum score of the approximate matches
+    5. top_results --  the number of best matches to keep (0 keeps every match)
+    6. max_hits    --  (optional) stop reading the file after that many hits (without top_results)
+
+    Return values: (same as exact_search)
+    """
     args = tuple(args.split(SEPARATOR))
-    found = 0
-    search_output = ''
-
     file_name = args[0]
     query = args[1]
     search_dir = args[2]
     close_match_cutoff = float(args[3])
+    top_results = int(args[4])
+    max_hits = int(args[5]) if len(args) > 5 else 0
 
-    if not file_name.endswith('.txt'):
-        return search_output, found
+    if not file_name.endswith(SEARCHED_EXTENSIONS):
+        return file_name, None, 0, []
 
     file_dir = os.path.join(search_dir, file_name)
-    result_num = 1
-    with open(file_dir, 'r', encoding='utf8') as searched_file:
-        for index, line in enumerate(searched_file, start=1):
-            match = get_close_matches(query.lower(), line.lower().split(), result_num, close_match_cutoff)
-            if not match:
+    hits, line_count = approximate_hits(file_dir, query, close_match_cutoff, top_results=top_results, max_hits=max_hits)
+    return file_name, None, line_count, hits
+
+
+def indexed_search(args):
+    """
+    Verify the candidate lines of a single file against the exact query.
+
+    Keyword arguments:
+    1. file_name   --  the name of the file to be verified
+    2. query       --  the user's search query
+    3. search_dir  --  the full path to the search directory
+    4. lines       --  the candidate line numbers returned by the index (e.g. 1,5,12)
+
+    Return values: (same as exact_search)
+    """
+    args = tuple(args.split(SEPARATOR))
+    file_name = args[0]
+    query = args[1].lower()
+    search_dir = args[2]
+    candidates = {int(line) for line in args[3].split(',')}
+    last_candidate = max(candidates)
+
+    hits = []
+    line_count = 0
+    file_dir = os.path.join(search_dir, file_name)
+    for line_count, line in enumerate(read_lines(file_dir), start=1):
+        if line_count > last_candidate:
+            break
+        if line_count in candidates and query in line.lower():
+            hits.append((line_count, line.strip(), None))
+    return file_name, None, line_count, hits
+
+
+def pool_ready(_):
+    """Trivial task used to make sure every pool worker has finished starting up."""
+    return os.getpid()
+
+
+def timed_task(task):
+    """
+    Run a (function, arguments) search task and measure how the worker spent its time.
+
+    Return values:
+    * result        --  the result of the search task
+    * stats (tuple) --  (worker, io_wait, compute) where
+                        worker is the (pid, thread id) that ran the task,
+                        io_wait is the wall-clock time during which the worker wasn't running (blocked on I/O),
+                        compute is the cpu time used by the worker
+
+    Inline and thread pool tasks share the main process with each other, so only the cpu time
+    of their own thread is counted. Worker processes count the cpu time of the whole process.
+    """
+    function, arguments = task
+    cpu_clock = thread_time if parent_process() is None else process_time
+    start_time = perf_counter()
+    start_cpu = cpu_clock()
+    result = function(arguments)
+    compute = cpu_clock() - start_cpu
+    return result, ((os.getpid(), get_ident()), max(perf_counter() - start_time - compute, 0), compute)
+
+# ------------------------ #
+# MMAP EXACT SEARCH ENGINE #
+# ------------------------ #
+
+# The only characters that can't be reached by upper-/titlecasing their lowercase form
+UNCASED_VARIANTS = {'\u03b8' : '\u03f4', '\u00df' : '\u1e9e', '\u03c9' : '\u2126', 'k' : '\u212a', '\u00e5' : '\u212b'}
+
+# The only character whose lowercase form is longer than itself: 'İ'.lower() == 'i̇' (i + U+0307),
+# so the lines containing it also contain a lowercase 'i' (see caseless_lines)
+DOTTED_CAPITAL_I = '\u0130'
+EXPANDING_VARIANTS = {'i' : (DOTTED_CAPITAL_I,), 'i\u0307' : ('i\u0307', 'I\u0307', DOTTED_CAPITAL_I)}
+
+def case_variants(char):
+    """Return every single character whose lowercase form equals that of char."""
+    lowered = char.lower()
+    candidates = {char, lowered, lowered.upper(), lowered.title(), UNCASED_VARIANTS.get(lowered, char)}
+    return tuple(sorted(variant for variant in candidates if len(variant) == 1 and variant.lower() == lowered))
+
+
+def encoded_variants(char):
+    """
+    Return the distinct encodings of every case variant of char, in every candidate encoding able to encode it.
+    The expanding variants (see EXPANDING_VARIANTS) are included too, so the pattern may match a bit too much.
+    """
+    variants = {}
+    for variant in case_variants(char) + EXPANDING_VARIANTS.get(char.lower(), ()):
+        for encoding in CANDIDATE_ENCODINGS:
+            try:
+                variants.setdefault(variant.encode(encoding))
+            except UnicodeEncodeError:
+                continue
+    return tuple(variants)
+
+
+@lru_cache(maxsize=32)
+def caseless_pattern(query):
+    """
+    Compile a bytes pattern matching query regardless of letter case, encoded in any of the candidate
+    encodings (see CANDIDATE_ENCODINGS). As every character is matched on its own, a match can mix up
+    encodings, hence caseless_lines() checks the decoded lines of non-ASCII queries once more.
+    An 'i' followed by a combining dot is matched as a whole, since 'İ' lowercases to both of them.
+    """
+    pattern = []
+    for char in re.findall('[iI]\u0307|.', query, re.DOTALL):
+        variants = tuple(re.escape(variant) for variant in encoded_variants(char))
+        if len(variants) == 1:
+            pattern.append(variants[0])
+        else:
+            pattern.append(b'(?:' + b'|'.join(variants) + b')')
+    return re.compile(b''.join(pattern))
+
+
+@lru_cache(maxsize=32)
+def caseless_text_pattern(query):
+    """Compile the str equivalent of caseless_pattern(), matched against decoded lines."""
+    return re.compile(''.join(f"(?:{'|'.join(map(re.escape, case_variants(char)))})" for char in query))
+
+
+def query_anchor(query):
+    """
+    Return the longest part of query that can be searched for with lowercased ASCII bytes.
+
+    Non-ASCII characters may have case variants of a different byte length, 'k' has the
+    (non-ASCII) Kelvin sign as a variant and 'i' is part of the lowercase form of 'İ',
+    so they all have to be left to caseless_pattern().
+    """
+    anchors = re.split(r'[^\x00-\x7f]|[kKiI]', query)
+    return max(anchors, key=len).lower().encode('ascii')
+
+
+def caseless_lines(buffer, start, end, query):
+    """
+    Yield the (start, end) byte offsets of every line of buffer[start:end] containing query,
+    regardless of letter case. The range must be newline-aligned (see plan_ranges).
+
+    If the query contains characters that bytes.lower() can't handle, the ASCII anchor
+    only narrows down the candidate lines, which are then verified with caseless_pattern()
+    and, for non-ASCII queries, decoded and verified with caseless_text_pattern().
+    Lines containing 'İ' (or a combining dot) are verified against their lowercased text instead,
+    exactly like query.lower() in line.lower(), when the lowercase query contains an 'i'.
+    """
+    anchor = query_anchor(query)
+    pattern = caseless_pattern(query)
+    text_pattern = None if query.isascii() else caseless_text_pattern(query)
+    lowered_query = query.lower()
+    dotted_markers = tuple(marker.encode('utf8') for marker in (DOTTED_CAPITAL_I, '\u0307')) if 'i' in lowered_query else ()
+
+    def verify(line_start, line_end):
+        if not pattern.search(buffer, line_start, line_end):
+            return False
+        line = buffer[line_start:line_end]
+        if any(marker in line for marker in dotted_markers):
+            return lowered_query in decode_line(line, 'utf8').lower()
+        return text_pattern is None or text_pattern.search(decode_line(line, 'utf8'))
+
+    if not anchor:
+        next_line = start
+        for match in pattern.finditer(buffer, start, end):
+            if match.start() < next_line:
                 continue
-            score = SequenceMatcher(None, query, match[0]).ratio()
-            search_output = ''.join((search_output, f"{Tips.UNSURE1} 1 potential match at {Colors.BLUE}Line({index}){Colors.RESET} of {Colors.BLUE}{file_name}{Colors.RESET}\n"))
-            search_output = ''.join((search_output, f"{Tips.UNSURE2} {line.strip()}\n"))
-            search_output = ''.join((search_output, f"{Tips.UNSURE2} confidence: {Colors.YELLOW}{score:.5f}{Colors.RESET}\n"))
-            found += 1
-    return search_output, found
+            line_start = buffer.rfind(b'\n', 0, match.start()) + 1
+            line_end = buffer.find(b'\n', match.start(), end)
+            line_end = end if line_end == -1 else line_end
+            next_line = line_end + 1
+            if verify(line_start, line_end):
+                yield line_start, line_end
+        return
+
+    if len(anchor) == len(query):
+        yield from anchored_lines(buffer, start, end, anchor)
+    else:
+        yield from anchored_lines(buffer, start, end, anchor, verify)
+
+
+def anchored_lines(buffer, start, end, anchor, verify=None):
+    """
+    Yield the (start, end) byte offsets of every line of buffer[start:end] whose lowercased
+    bytes contain anchor and, if given, for which verify(line_start, line_end) is true.
+
+    The buffer is lowercased one fixed-size window at a time (bytes.lower() never changes
+    the length, so offsets still line up) and searched with bytes.find().
+    """
+    overlap = len(anchor) - 1
+    next_line = start
+    window_start = start
+    while window_start < end:
+        window_end = min(end, window_start + MMAP_CHUNK_SIZE)
+        window = buffer[window_start:min(end, window_end + overlap)].lower()
+        hit = window.find(anchor, max(0, next_line - window_start))
+        while hit != -1 and window_start + hit < window_end:
+            line_start = buffer.rfind(b'\n', 0, window_start + hit) + 1
+            line_end = buffer.find(b'\n', window_start + hit, end)
+            line_end = end if line_end == -1 else line_end
+            next_line = line_end + 1
+            if verify is None or verify(line_start, line_end):
+                yield line_start, line_end
+            hit = window.find(anchor, next_line - window_start)
+        window_start = window_end
+
+
+def count_newlines(buffer, start, end):
+    """Count the newlines in buffer[start:end] without copying more than one window at a time."""
+    newlines = 0
+    while start < end:
+        window_end = min(end, start + MMAP_CHUNK_SIZE)
+        newlines += buffer[start:window_end].count(b'\n')
+        start = window_end
+    return newlines
+
+
+def buffer_hits(buffer, start, end, query, file_dir, hits, line_number=1, line_finder=caseless_lines, max_hits=0):
+    """
+    Append the hits of buffer[start:end] to hits, numbering its lines from line_number.
+    With max_hits, the search stops as soon as hits holds that many of them.
+
+    Rather than decoding and lowercasing every single line, the buffer is scanned as raw bytes.
+    Only the lines that actually contain a hit are decoded (see guess_encoding), and their line
+    numbers are worked out by counting the newlines between consecutive hits.
+    The matching lines are found by line_finder(buffer, start, end, query).
+
+    Return values:
+    * newlines (int)  --  the number of newlines in buffer[start:end] (only up to the last hit if the search stopped)
+    """
+    encoding = None
+    newlines = 0
+    counted_until = start
+    for line_start, line_end in line_finder(buffer, start, end, query):
+        newlines += count_newlines(buffer, counted_until, line_start)
+        counted_until = line_start
+        if encoding is None:
+            encoding = guess_encoding(file_dir)  # files without a single hit are never sampled
+        line = decode_line(buffer[line_start:line_end], encoding)
+        hits.append((line_number + newlines, line.strip(), None))
+        if max_hits and len(hits) >= max_hits:
+            return newlines + count_newlines(buffer, counted_until, min(end, line_end + 1))
+    return newlines + count_newlines(buffer, counted_until, end)
+
+
+def mmap_hits(file_dir, query, start=0, end=None, line_finder=caseless_lines, max_hits=0):
+    """
+    Memory-mapped alternative to exact_hits(): the whole file (or byte range) is mapped
+    and searched at once (see buffer_hits).
+
+    Return values: (same as exact_hits)
+    """
+    hits = []
+    with open(file_dir, 'rb') as searched_file:
+        size = os.fstat(searched_file.fileno()).st_size
+        if not size:
+            return hits, 0
+        end = size if end is None else end
+        with mmap.mmap(searched_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            line_count = buffer_hits(buffer, start, end, query, file_dir, hits, 1, line_finder, max_hits)
+    return hits, line_count
+
+
+def mmap_search(args):
+    """
+    Memory-mapped alternative to exact_search() (see mmap_hits).
+
+    Keyword arguments: (same as exact_search)
+    1. file_name   --  the name of the file to be searched
+    2. query       --  the user's search query
+    3. search_dir  --  the full path to the search directory
+    4. max_hits    --  (optional) stop reading the file after that many hits
+
+    Return values: (same as exact_search)
+    """
+    args = tuple(args.split(SEPARATOR))
+    file_name = args[0]
+    query = args[1]
+    search_dir = args[2]
+    max_hits = int(args[3]) if len(args) > 3 else 0
+
+    if not file_name.endswith(SEARCHED_EXTENSIONS):
+        return file_name, None, 0, []
+
+    file_dir = os.path.join(search_dir, file_name)
+    if compressed_opener(file_name) is not None:
+        hits, line_count = exact_hits(file_dir, query, max_hits=max_hits)  # decompressed bytes can't be memory-mapped
+    else:
+        hits, line_count = mmap_hits(file_dir, query, max_hits=max_hits)
+    return file_name, None, line_count, hits
+
+# ----------------------------------- #
+# MULTI-PATTERN (AHO-CORASICK) SEARCH #
+# ----------------------------------- #
+
+@lru_cache(maxsize=8)
+def build_automaton(patterns):
+    """
+    Compile the (lowercased) patterns into an Aho-Corasick automaton.
+    Cached, so that every worker only builds it once per query.
+
+    Return values:
+    * goto (list)    --  the {character : next state} transitions of every state
+    * fail (list)    --  the state to fall back to when no transition matches
+    * output (list)  --  the indexes of the patterns that end at every state
+    """
+    goto = [{}]
+    fail = [0]
+    output = [()]
+    for pattern_index, pattern in enumerate(patterns):
+        state = 0
+        for char in pattern:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                fail.append(0)
+                output.append(())
+            state = next_state
+        output[state] += (pattern_index,)
+
+    # Breadth-first, so that the fail state of every state is already known when its children are reached
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            output[next_state] += output[fail[next_state]]
+    return goto, fail, output
+
+
+def automaton_matches(automaton, text):
+    """Return the indexes of every pattern found in text, in a single pass."""
+    goto, fail, output = automaton
+    found = set()
+    state = 0
+    for char in text:
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        if output[state]:
+            found.update(output[state])
+    return found
+
+
+def multi_hits(file_dir, patterns, start=0, end=None, max_hits=0):
+    """
+    Find the lines containing any of the patterns (case-insensitive) inside a file or a byte range of it.
+    With max_hits, the file is only read until that many hits were found.
+
+    Return values:
+    * hits (list)       --  [(line number counted from start, stripped line, None, matched patterns)]
+    * line_count (int)  --  the number of lines that were read
+    """
+    automaton = build_automaton(tuple(pattern.lower() for pattern in patterns))
+    hits = []
+    line_count = 0
+    for line_count, line in enumerate(read_lines(file_dir, start, end), start=1):
+        found = automaton_matches(automaton, line.lower())
+        if found:
+            hits.append((line_count, line.strip(), None, tuple(patterns[index] for index in sorted(found))))
+            if max_hits and len(hits) >= max_hits:
+                break
+    return hits, line_count
+
+
+def multi_search(args):
+    """
+    Search a single file for every pattern at once (see multi_hits).
+
+    Keyword arguments:
+    1. file_name   --  the name of the file to be searched
+    2. patterns    --  the patterns, separated by newlines
+    3. search_dir  --  the full path to the search directory
+    4. max_hits    --  (optional) stop reading the file after that many hits
+
+    Return values: (same as exact_search)
+    * hits (list)  --  every hit also ends with the patterns found in its line
+    """
+    args = tuple(args.split(SEPARATOR))
+    file_name = args[0]
+    patterns = tuple(args[1].split('\n'))
+    search_dir = args[2]
+    max_hits = int(args[3]) if len(args) > 3 else 0
+
+    if not file_name.endswith(SEARCHED_EXTENSIONS):
+        return file_name, None, 0, []
+
+    file_dir = os.path.join(search_dir, file_name)
+    hits, line_count = multi_hits(file_dir, patterns, max_hits=max_hits)
+    return file_name, None, line_count, hits
+
+# ------------------------- #
+# REGULAR EXPRESSION SEARCH #
+# ------------------------- #
+
+# The ASCII letters that re.IGNORECASE also matches with non-ASCII characters (e.g. the Kelvin sign)
+REGEX_UNSAFE_LETTERS = 'iIkKsS'
+
+@lru_cache(maxsize=32)
+def compile_regex(pattern):
+    """Compile a (case-insensitive) search pattern. Cached, so that every worker only compiles it once per query."""
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def required_literals(parsed):
+    """
+    Return the literal strings that every match of a parsed regex (see regex_anchor) must contain.
+    Groups are read through, mandatory repeats are searched separately and everything else
+    (alternations, character sets, optional parts, ...) simply ends the current literal.
+    """
+    literals = []
+    run = []
+    items = list(parsed)
+    while items:
+        opcode, argument = items.pop(0)
+        if opcode is regex_opcodes.LITERAL:
+            run.append(chr(argument))
+            continue
+        if opcode is regex_opcodes.SUBPATTERN:
+            items[0:0] = list(argument[-1])  # (group, add_flags, del_flags, pattern)
+            continue
+        literals.append(''.join(run))
+        run = []
+        if opcode in (regex_opcodes.MAX_REPEAT, regex_opcodes.MIN_REPEAT) and argument[0] >= 1:
+            literals += required_literals(argument[2])  # (min, max, pattern)
+    literals.append(''.join(run))
+    return [literal for literal in literals if literal]
+
+
+@lru_cache(maxsize=32)
+def regex_anchor(pattern):
+    """
+    Return the longest required literal of a regex that can be searched for with lowercased ASCII bytes
+    (b'' if there is none), so that the regex itself only runs on the lines containing it.
+    """
+    try:
+        literals = required_literals(regex_parser.parse(pattern, re.IGNORECASE))
+    except Exception:  # the parser is private, so never let it break a search
+        return b''
+    anchors = ['']
+    for literal in literals:
+        anchors += re.split(rf'[^\x00-\x7f]|[{REGEX_UNSAFE_LETTERS}]', literal)
+    return max(anchors, key=len).lower().encode('ascii')
+
+
+def regex_lines(buffer, start, end, pattern):
+    """Yield the (start, end) byte offsets of every line of buffer[start:end] matching the regex (see caseless_lines)."""
+    compiled = compile_regex(pattern)
+
+    def verify(line_start, line_end):
+        line = decode_line(buffer[line_start:line_end], 'utf8').rstrip('\r')
+        return compiled.search(line)
+
+    yield from anchored_lines(buffer, start, end, regex_anchor(pattern), verify)
+
+
+def regex_hits(file_dir, pattern, start=0, end=None, max_hits=0):
+    """
+    Find the lines matching a regex (case-insensitive) inside a file or a byte range of it.
+    If the regex requires a literal, only the lines containing it are decoded and matched.
+    With max_hits, the file is only read until that many hits were found.
+
+    Return values: (same as exact_hits)
+    """
+    if regex_anchor(pattern):
+        if compressed_opener(file_dir) is not None:
+            return exact_hits(file_dir, pattern, start, end, regex_lines, max_hits)
+        return mmap_hits(file_dir, pattern, start, end, regex_lines, max_hits)
+
+    compiled = compile_regex(pattern)
+    hits = []
+    line_count = 0
+    for line_count, line in enumerate(read_lines(file_dir, start, end), start=1):
+        if compiled.search(line.rstrip('\r\n')):
+            hits.append((line_count, line.strip(), None))
+            if max_hits and len(hits) >= max_hits:
+                break
+    return hits, line_count
+
+
+def regex_search(args):
+    """
+    Search a single file for the lines matching a regex (see regex_hits).
+
+    Keyword arguments: (same as exact_search)
+    1. file_name   --  the name of the file to be searched
+    2. query       --  the regex
+    3. search_dir  --  the full path to the search directory
+    4. max_hits    --  (optional) stop reading the file after that many hits
+
+    Return values: (same as exact_search)
+    """
+    args = tuple(args.split(SEPARATOR))
+    file_name = args[0]
+    pattern = args[1]
+    search_dir = args[2]
+    max_hits = int(args[3]) if len(args) > 3 else 0
+
+    if not file_name.endswith(SEARCHED_EXTENSIONS):
+        return file_name, None, 0, []
+
+    file_dir = os.path.join(search_dir, file_name)
+    hits, line_count = regex_hits(file_dir, pattern, max_hits=max_hits)
+    return file_name, None, line_count, hits
+
+# ---------------------------------- #
+# BYTE-RANGE SPLITTING RELATED STUFF #
+# ---------------------------------- #
+
+def plan_ranges(file_dir, size, range_size=SPLIT_SIZE):
+    """
+    Split a file into newline-aligned byte ranges of roughly range_size bytes.
+
+    Return values:
+    * ranges (tuple)  --  ((start, end), ...) covering the whole file
+    """
+    ranges = []
+    start = 0
+    with open(file_dir, 'rb') as split_file:
+        while start < size:
+            split_file.seek(start + range_size)
+            split_file.readline()  # move on to the beginning of the next line
+            end = min(size, split_file.tell())
+            if end <= start:
+                end = size
+            ranges.append((start, end))
+            start = end
+    return tuple(ranges)
+
+
+def range_search(args):
+    """
+    Search a single byte range of a large file.
+
+    Keyword arguments:
+    1. searcher    --  'exact', 'mmap', 'multi', 'regex' or 'approx'
+    2. file_name   --  the name of the file to be searched
+    3. query       --  the user's search query (the newline-separated patterns for 'multi')
+    4. search_dir  --  the full path to the search directory
+    5. score       --  the approximate searcher cutoff (ignored by exact searchers)
+    6. start, end  --  the newline-aligned byte range (see plan_ranges)
+    7. part        --  the position of the range inside the file
+    8. top_results --  the number of best approximate matches to keep (0 keeps every match)
+    9. max_hits    --  stop reading the range after that many hits (0 reads all of it)
+
+    Return values: (same as exact_search)
+    * part (int)    --  the position of the range inside the file
+    * hits (list)   --  line numbers are counted from the start of the range
+    """
+    args = tuple(args.split(SEPARATOR))
+    searcher = args[0]
+    file_name = args[1]
+    query = args[2]
+    file_dir = os.path.join(args[3], file_name)
+    start = int(args[5])
+    end = int(args[6])
+    part = int(args[7])
+    max_hits = int(args[9])
+
+    if searcher == 'approx':
+        hits, line_count = approximate_hits(file_dir, query, float(args[4]), start, end, int(args[8]), max_hits)
+    elif searcher == 'mmap':
+        hits, line_count = mmap_hits(file_dir, query, start, end, max_hits=max_hits)
+    elif searcher == 'regex':
+        hits, line_count = regex_hits(file_dir, query, start, end, max_hits)
+    elif searcher == 'multi':
+        hits, line_count = multi_hits(file_dir, tuple(query.split('\n')), start, end, max_hits)
+    else:
+        hits, line_count = exact_hits(file_dir, query, start, end, max_hits=max_hits)
+    return file_name, part, line_count, hits
+
+
+def count_search(args):
+    """
+    Count the hits of a single file or byte range (see count_hits).
+
+    Keyword arguments:
+    1. searcher    --  'exact', 'mmap', 'multi', 'regex' or 'approx'
+    2. file_name   --  the name of the file to be searched
+    3. query       --  the user's search query (the newline-separated patterns for 'multi')
+    4. search_dir  --  the full path to the search directory
+    5. score       --  the approximate searcher cutoff (ignored by exact searchers)
+    6. start, end  --  the newline-aligned byte range (both empty for whole files)
+    7. part        --  the position of the range inside the file (empty for whole files)
+
+    Return values: (same as exact_search)
+    * hits (int)  --  the number of hits instead of the hits themselves
+    """
+    args = tuple(args.split(SEPARATOR))
+    searcher = args[0]
+    file_name = args[1]
+    query = args[2]
+    file_dir = os.path.join(args[3], file_name)
+    start, end, part = (int(arg) if arg else None for arg in args[5:8])
+
+    if not file_name.endswith(SEARCHED_EXTENSIONS):
+        return file_name, part, 0, 0
+
+    count, line_count = count_hits(searcher, file_dir, query, float(args[4]), start or 0, end)
+    return file_name, part, line_count, count
+
+# ------------------------------ #
+# COMPRESSED FILES RELATED STUFF #
+# ------------------------------ #
+
+def compressed_opener(file_name):
+    """Return the function opening a compressed .txt file (see COMPRESSED_OPENERS), or None for other files."""
+    for extension, opener in COMPRESSED_OPENERS.items():
+        if file_name.endswith(extension):
+            return opener
+    return None
+
+
+class ReadAheadFile(io.RawIOBase):
+    """
+    A read-only binary file whose blocks are read from open_source() by a background thread,
+    up to 'blocks' blocks in advance. The disk and the decompressors release the GIL, so the
+    next blocks are read (or decompressed) while the current ones are used (see open_searched).
+    Errors of the background thread are raised by the read that reaches them.
+    """
+    def __init__(self, open_source, block_size=COMPRESSED_BLOCK_SIZE, blocks=COMPRESSED_READ_AHEAD):
+        super().__init__()
+        self.blocks = Queue(maxsize=blocks)
+        self.pending = memoryview(b'')
+        self.finished = False
+        self.stopped = Event()
+        self.reader = Thread(target=self.read_blocks, args=(open_source, block_size), daemon=True)
+        self.reader.start()
+
+    def read_blocks(self, open_source, block_size):
+        try:
+            with open_source() as source_file:
+                block = source_file.read(block_size)
+                while block and self.put_block(block):
+                    block = source_file.read(block_size)
+            self.put_block(b'')
+        except Exception as error:  # corrupted archives raise EOFError, LZMAError, ...
+            self.put_block(error)
+
+    def put_block(self, block):
+        """Queue a block, unless the file is closed first. Return False if it was."""
+        while not self.stopped.is_set():
+            try:
+                self.blocks.put(block, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def get_block(self):
+        """Wait for the next block, unless the file is closed first (which also stops a reader blocked on it)."""
+        while not self.stopped.is_set():
+            try:
+                return self.blocks.get(timeout=0.1)
+            except Empty:
+                continue
+        raise ValueError('read of closed file')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.pending:
+            if self.finished:
+                return 0
+            block = self.get_block()
+            if isinstance(block, Exception):
+                raise block
+            if not block:
+                self.finished = True
+                return 0
+            self.pending = memoryview(block)
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        self.stopped.set()
+        super().close()
+
+
+@contextmanager
+def open_searched(file_dir):
+    """
+    Open a searched file in binary mode. Compressed files (see COMPRESSED_OPENERS) are
+    decompressed on the fly, so line numbers and byte offsets refer to the decompressed content.
+
+    Reading the compressed file, decompressing it and searching the decompressed bytes
+    run on three threads, each one a few blocks ahead of the next (see ReadAheadFile).
+    Compressed files can't seek.
+    """
+    opener = compressed_opener(file_dir)
+    if opener is None:
+        with open(file_dir, 'rb') as searched_file:
+            yield searched_file
+        return
+
+    with ReadAheadFile(partial(open, file_dir, 'rb')) as compressed_file:
+        with ReadAheadFile(partial(opener, compressed_file, 'rb')) as decompressed_file:
+            with io.BufferedReader(decompressed_file, COMPRESSED_BLOCK_SIZE) as searched_file:
+                yield searched_file
+
+# ---------------------------- #
+# SEARCH INDEXES RELATED STUFF #
+# ---------------------------- #
+
+def file_signature(file_dir):
+    """Return the (size, mtime) pair used to detect modified files."""
+    file_stat = os.stat(file_dir)
+    return file_stat.st_size, file_stat.st_mtime_ns
+
+
+def line_grams(line, gram_size=INDEX_GRAM_SIZE):
+    """Return the set of lowercased n-grams contained in a single line."""
+    line = line.lower()
+    return {line[i:i + gram_size] for i in range(len(line) - gram_size + 1)}
+
+
+def index_file(args):
+    """
+    Build the trigram postings of a single file.
+
+    Keyword arguments:
+    1. file_name   --  the name of the file to be indexed
+    2. search_dir  --  the full path to the search directory
+
+    Return values:
+    * file_name (str)   --  the name of the indexed file
+    * signature (tuple) --  the (size, mtime) of the file at indexing time
+    * postings (dict)   --  {trigram : (line numbers)}
+    """
+    args = tuple(args.split(SEPARATOR))
+    file_name = args[0]
+    search_dir = args[1]
+
+    file_dir = os.path.join(search_dir, file_name)
+    signature = file_signature(file_dir)
+    postings = {}
+    for index, line in enumerate(read_lines(file_dir), start=1):
+        for gram in line_grams(line.rstrip('\r\n')):
+            postings.setdefault(gram, []).append(index)
+    return file_name, signature, {gram: tuple(lines) for gram, lines in postings.items()}
+
+
+def vocabulary_file(args):
+    """
+    Build the vocabulary of a single file, i.e. the postings of every distinct lowercased word.
+
+    Keyword arguments: (same as index_file)
+
+    Return values:
+    * file_name (str), signature (tuple)  --  (same as index_file)
+    * postings (dict)                     --  {word : (line numbers)}
+    """
+    args = tuple(args.split(SEPARATOR))
+    file_name = args[0]
+    search_dir = args[1]
+
+    file_dir = os.path.join(search_dir, file_name)
+    signature = file_signature(file_dir)
+    postings = {}
+    for index, line in enumerate(read_lines(file_dir), start=1):
+        for word in set(line.lower().split()):
+            postings.setdefault(word, []).append(index)
+    return file_name, signature, {word: tuple(lines) for word, lines in postings.items()}
+
+
+def score_words(args):
+    """
+    Score a batch of distinct vocabulary words exactly like get_close_matches() would.
+
+    Keyword arguments:
+    1. query     --  the user's search query
+    2. score     --  the minimum score of the approximate matches
+    3. words     --  the words to be scored, separated by newlines
+
+    Return values:
+    * scores (list)  --  [(word, ratio)] for every word that reached the cutoff
+    """
+    args = tuple(args.split(SEPARATOR))
+    query = args[0].lower()
+    close_match_cutoff = float(args[1])
+    passes = qgram_prefilter(query, close_match_cutoff)
+
+    scores = []
+    matcher = SequenceMatcher()
+    matcher.set_seq2(query)
+    for word in args[2].split('\n'):
+        if not passes(word):
+            continue
+        ratio = close_match_ratio(matcher, word, close_match_cutoff)
+        if ratio is not None:
+            scores.append((word, ratio))
+    return scores
+
+
+def vocabulary_search(args):
+    """
+    Read back the lines that the vocabulary matched to the approximate query.
+
+    Keyword arguments:
+    1. file_name   --  the name of the file
+    2. query       --  the user's search query
+    3. search_dir  --  the full path to the search directory
+    4. lines       --  the best word of every matching line, as 'line word' pairs separated by newlines
+    5. ranked      --  '1' to end every hit with its ranking ratio (see approximate_hits)
+
+    Return values: (same as exact_search)
+    """
+    args = tuple(args.split(SEPARATOR))
+    file_name = args[0]
+    query = args[1]
+    search_dir = args[2]
+    ranked = args[4] == '1'
+    best_words = {}
+    for pair in args[3].split('\n'):
+        line_number, word = pair.split(' ', 1)
+        best_words[int(line_number)] = word
+    last_line = max(best_words)
+
+    hits = []
+    line_count = 0
+    file_dir = os.path.join(search_dir, file_name)
+    for line_count, line in enumerate(read_lines(file_dir), start=1):
+        if line_count > last_line:
+            break
+        if line_count in best_words:
+            score = SequenceMatcher(None, query, best_words[line_count]).ratio()
+            if ranked:
+                ratio = SequenceMatcher(None, best_words[line_count], query.lower()).ratio()
+                hits.append((line_count, line.strip(), score, ratio))
+            else:
+                hits.append((line_count, line.strip(), score))
+    return file_name, None, line_count, hits
+
+
+def vocabulary_candidates(vocabulary, scores):
+    """
+    Expand the scored words through the vocabulary postings.
+
+    Keyword arguments:
+    * vocabulary (dict)  --  the vocabulary index (see load_index)
+    * scores (dict)      --  {word : ratio} of every word that reached the cutoff
+
+    Return values:
+    * candidates (dict)  --  {file_name : {line number : best word}}
+                             ties are broken like get_close_matches() (the greater word wins)
+    """
+    candidates = {}
+    for file_name, (_, postings) in vocabulary['files'].items():
+        best_words = {}
+        for word, ratio in scores.items():
+            for line_number in postings.get(word, ()):
+                best_word = best_words.get(line_number)
+                if best_word is None or (ratio, word) > (scores[best_word], best_word):
+                    best_words[line_number] = word
+        if best_words:
+            candidates[file_name] = best_words
+    return candidates
+
+
+def top_candidates(candidates, scores, top_results):
+    """
+    Keep only the top_results candidate lines (see vocabulary_candidates) with the best ratios.
+    Ties are broken on (file_name, line_number), exactly like parse_search_results() ranks them.
+    """
+    ranked_lines = (
+        (scores[word], file_name, line_number, word)
+        for file_name, best_words in candidates.items()
+        for line_number, word in sorted(best_words.items())
+    )
+    kept_candidates = {}
+    for _, file_name, line_number, word in nsmallest(top_results, ranked_lines, key=lambda line: (-line[0], line[1], line[2])):
+        kept_candidates.setdefault(file_name, {})[line_number] = word
+    return kept_candidates
+
+
+def index_location(index_dir, search_dir, extension='idx'):
+    """Return the index file path associated with a given search directory."""
+    dir_key = sha1(os.path.realpath(search_dir).encode('utf8')).hexdigest()
+    return os.path.join(index_dir, f"{dir_key}.{extension}")
+
+
+def load_index(index_dir, search_dir, extension='idx'):
+    """
+    Read the on-disk index of a search directory.
+    (extension: 'idx' for the trigram index, 'voc' for the vocabulary)
+
+    Return values:
+    * index (dict)  --  {'version', 'search_dir', 'files' : {file_name : (signature, postings)}}
+                        an empty index is returned if none exists or if it is unusable
+    """
+    empty_index = {'version' : INDEX_VERSION, 'search_dir' : os.path.realpath(search_dir), 'files' : {}}
+    try:
+        with open(index_location(index_dir, search_dir, extension), 'rb') as index_file_obj:
+            index = pickle.load(index_file_obj)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return empty_index
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return empty_index
+    if index.get('search_dir') != empty_index['search_dir']:
+        return empty_index
+    return index
+
+
+def save_index(index_dir, search_dir, index, extension='idx'):
+    """Write the index of a search directory to the index folder."""
+    if not os.path.exists(index_dir):
+        os.makedirs(index_dir)
+    index_path = index_location(index_dir, search_dir, extension)
+    temp_path = f"{index_path}.tmp"
+    with open(temp_path, 'wb') as index_file_obj:
+        pickle.dump(index, index_file_obj, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, index_path)
+
+
+def stale_index_files(index, search_dir, recursive=False):
+    """
+    Compare the index against the search directory.
+
+    Return values:
+    * stale_files (tuple)    --  new or modified .txt files that must be (re)indexed
+    * removed_files (tuple)  --  indexed files that no longer exist
+    """
+    indexed_files = index['files']
+    current_files = set()
+    stale_files = []
+    for file_name in walk_files(search_dir, recursive, ('.txt',)):
+        file_dir = os.path.join(search_dir, file_name)
+        current_files.add(file_name)
+        entry = indexed_files.get(file_name)
+        if entry is None or entry[0] != file_signature(file_dir):
+            stale_files.append(file_name)
+    removed_files = tuple(file_name for file_name in indexed_files if file_name not in current_files)
+    return tuple(stale_files), removed_files
+
+
+def index_candidates(index, query):
+    """
+    Look up the candidate lines of every indexed file for a given query.
+
+    Return values:
+    * None  --  if the query is too short to be looked up (shorter than a trigram)
+    * candidates (dict)  --  {file_name : (candidate line numbers)}
+    """
+    query_grams = line_grams(query)
+    if not query_grams:
+        return None
+
+    candidates = {}
+    for file_name, (_, postings) in index['files'].items():
+        gram_lines = []
+        for gram in query_grams:
+            lines = postings.get(gram)
+            if lines is None:
+                break
+            gram_lines.append(lines)
+        else:
+            gram_lines.sort(key=len)
+            matching_lines = set(gram_lines[0])
+            for lines in gram_lines[1:]:
+                matching_lines.intersection_update(lines)
+                if not matching_lines:
+                    break
+            if matching_lines:
+                candidates[file_name] = tuple(sorted(matching_lines))
+    return candidates
+
+# -------------------------------- #
+# QUERY RESULT CACHE RELATED STUFF #
+# -------------------------------- #
+
+def file_fingerprint(file_dir):
+    """Return the (size, mtime, inode) triple used to detect modified or replaced files."""
+    stat = os.stat(file_dir)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def cache_location(cache_dir, cache_key):
+    """Return the cache file path associated with a given cache key."""
+    return os.path.join(cache_dir, f"{sha1(repr(cache_key).encode('utf8')).hexdigest()}.cache")
+
+
+def load_cached_results(cache_dir, cache_key):
+    """
+    Read the cached results of a search and mark them as recently used.
+
+    Return values:
+    * entry (dict)  --  {'version', 'key', 'files' : {file_name : (fingerprint, hits)}}
+                        an empty entry is returned if none exists or if it is unusable
+    """
+    empty_entry = {'version' : CACHE_VERSION, 'key' : cache_key, 'files' : {}}
+    cache_path = cache_location(cache_dir, cache_key)
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            entry = pickle.load(cache_file)
+        os.utime(cache_path)  # the modification time orders the entries for eviction
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return empty_entry
+    if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION or entry.get('key') != cache_key:
+        return empty_entry
+    return entry
+
+
+def save_cached_results(cache_dir, entry, size_limit):
+    """
+    Write the results of a search to the cache folder, then evict the least
+    recently used entries until the whole folder fits in size_limit bytes.
+    """
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    cache_path = cache_location(cache_dir, entry['key'])
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, 'wb') as cache_file:
+        pickle.dump(entry, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
+
+    cached_files = []
+    for cached_file in os.scandir(cache_dir):
+        if cached_file.name.endswith('.cache'):
+            stat = cached_file.stat()
+            cached_files.append((stat.st_mtime_ns, stat.st_size, cached_file.path))
+    cached_files.sort()
+    total_size = sum(size for _, size, _ in cached_files)
+    for _, size, path in cached_files:
+        if total_size <= size_limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
+
+
+def clear_cached_results(cache_dir):
+    """Delete every cached search result. Return the number of deleted entries."""
+    removed = 0
+    if not os.path.exists(cache_dir):
+        return removed
+    for cached_file in os.scandir(cache_dir):
+        if cached_file.name.endswith('.cache'):
+            os.remove(cached_file.path)
+            removed += 1
+    return removed
+
+# ---------------------------------- #
+# EXECUTION STRATEGIES RELATED STUFF #
+# ---------------------------------- #
+
+def write_calibration_corpus(corpus_dir, files, file_size):
+    """Write files of file_size bytes of plain ASCII lines (searched by the executor calibration)."""
+    line = ' '.join(('lorem', 'ipsum', 'dolor', 'sit', 'amet') * 3) + '\n'
+    content = (line * (file_size // len(line) + 1))[:file_size]
+    for file_number in range(files):
+        with open(os.path.join(corpus_dir, f"calibration{file_number:04d}.txt"), 'w', encoding='utf8', newline='\n') as corpus_file:
+            corpus_file.write(content)
+
+
+def fit_costs(small_run, large_run):
+    """
+    Solve seconds = files * file_cost + bytes * byte_cost from two timed runs.
+
+    Keyword arguments:
+    * small_run, large_run (tuple)  --  the (files, bytes, seconds) of a run over many tiny files
+                                        and of a run over a few large ones
+
+    Return values:
+    * file_cost (float)  --  the seconds spent on every file (task overhead, opening, ...)
+    * byte_cost (float)  --  the seconds spent on every searched byte
+    """
+    (small_files, small_bytes, small_time), (large_files, large_bytes, large_time) = small_run, large_run
+    determinant = large_bytes * small_files - small_bytes * large_files
+    byte_cost = (large_time * small_files - small_time * large_files) / determinant
+    byte_cost = max(byte_cost, large_time / large_bytes / 10)  # timing noise can't make bytes free
+    file_cost = max((small_time - small_bytes * byte_cost) / small_files, 0.0)
+    return file_cost, byte_cost
+
+
+def calibration_keywords(workers):
+    """Return the keywords of the calibration file measured with the given number of workers."""
+    return [f"{strategy}_{cost}_{workers}" for strategy in EXECUTOR_STRATEGIES for cost in CALIBRATION_COSTS]
+
+
+def parse_calibration(settings, workers):
+    """
+    Turn the saved calibration settings of a number of workers into {strategy : (startup, file_cost, byte_cost)}.
+    Return None if they are missing, invalid or were saved by another calibration version.
+    """
+    if settings.get('version') != str(CALIBRATION_VERSION):
+        return None
+    try:
+        return {
+            strategy : tuple(float(settings[f"{strategy}_{cost}_{workers}"]) for cost in CALIBRATION_COSTS)
+            for strategy in EXECUTOR_STRATEGIES
+        }
+    except (KeyError, ValueError):
+        return None
+
+
+def start_executor(strategy, workers):
+    """
+    Start a new executor of a strategy (see EXECUTOR_STRATEGIES), apart from the session-wide ones.
+
+    Return values:
+    * executor (Pool, ThreadPool or InlinePool)  --  the started executor (terminate() it when done)
+    * startup (float)                            --  the time spent starting it
+    """
+    start_time = perf_counter()
+    if strategy == 'processes':
+        executor = Pool(workers)
+        executor.map(pool_ready, range(workers), chunksize=1)
+    elif strategy == 'threads':
+        executor = ThreadPool(workers)
+    else:
+        executor = InlinePool()
+    return executor, perf_counter() - start_time
+
+
+def estimate_seconds(calibration, strategy, files, size, searcher='exact', running=()):
+    """Estimate how long a strategy takes to search files totalling size bytes (see parse_calibration)."""
+    startup, file_cost, byte_cost = calibration[strategy]
+    if strategy in running:
+        startup = 0
+    return startup + files * file_cost + size * byte_cost * SEARCHER_COSTS[searcher]
+
+
+def choose_strategy(calibration, files, size, searcher='exact', running=()):
+    """
+    Return the fastest strategy for files totalling size bytes, and whether it is settled.
+
+    A strategy is settled once it is the fastest one and no other strategy spends less time
+    per file or per byte: however many files follow, the decision can't change anymore.
+    """
+    estimates = {strategy : estimate_seconds(calibration, strategy, files, size, searcher, running) for strategy in EXECUTOR_STRATEGIES}
+    strategy = min(EXECUTOR_STRATEGIES, key=estimates.get)
+    _, file_cost, byte_cost = calibration[strategy]
+    settled = all(
+        file_cost <= other_file_cost and byte_cost <= other_byte_cost
+        for _, other_file_cost, other_byte_cost in calibration.values()
+    )
+    return strategy, settled
 
 
 # ------------------------------- #
@@ -147,19 +1784,68 @@ if __name__ == '__main__':
     notifications = ''
     saved_columns = 0
     approx_score = 0.85
+    top_results = 0
+
+    # Stop after that many results (0: no limit), or only print the names of the files with matches
+    result_limit = 0
+    files_only = False
+
+    # Only print the number of matching lines of every file (ignores /limit and the indexes)
+    count_mode = False
+
+    # The query tagged on every JSON result of the batch mode (None: human-readable results)
+    json_query = None
+    json_stats = False
+
+    # The summary and statistics of the last search (see /stats)
+    last_search = None
 
     SYSTEM_CPUS = os.cpu_count()
     allocated_threads = SYSTEM_CPUS
 
+    # Print grep-like results without colors when the output is piped to another program
+    PLAIN_OUTPUT = not sys.stdout.isatty() or 'NO_COLOR' in os.environ
+
+    # The worker pool is kept alive for the whole session and only replaced by /t
+    search_pool = None
+    pool_workers = 0
+
+    # The same goes for the thread pool. active_workers is the size of the executor in use
+    thread_pool = None
+    thread_workers = 0
+    active_workers = 1
+
+    # The search indexes are only read from the disk once per session ({(real path, extension) : index})
+    loaded_indexes = {}
+
     CONFIG_DIR = os.path.join(SCRIPT_DIR, 'config')
     SETTINGS_DIR = os.path.join(CONFIG_DIR, f"{PROGRAM.lower()}.conf")
+    INDEX_DIR = os.path.join(CONFIG_DIR, 'index')
+    CACHE_DIR = os.path.join(CONFIG_DIR, 'cache')
+    CALIBRATION_DIR = os.path.join(CONFIG_DIR, 'executor.conf')
     DEFAULT_TARGET_DIR = os.path.join(SCRIPT_DIR, 'example')
 
     # Program configurations
     TARGET_DIR_KEYWORD = 'target_dir'
     METHOD_KEYWORD = 'method'
-    SEARCH_METHODS = ('exact_match', 'proximity_match')
-    DEFAULT_SETTINGS_ARGS = {TARGET_DIR_KEYWORD : DEFAULT_TARGET_DIR, METHOD_KEYWORD : SEARCH_METHODS[0]}
+    INDEX_KEYWORD = 'index'
+    RECURSIVE_KEYWORD = 'recursive'
+    ENGINE_KEYWORD = 'engine'
+    CACHE_KEYWORD = 'cache_size'
+    EXECUTOR_KEYWORD = 'executor'
+    SEARCH_METHODS = ('exact_match', 'proximity_match', 'multi_match', 'regex_match')
+    SEARCH_ENGINES = ('line', 'mmap')
+    TOGGLE_STATES = ('disabled', 'enabled')
+    EXECUTOR_MODES = ('auto',) + EXECUTOR_STRATEGIES
+    DEFAULT_SETTINGS_ARGS = {
+        TARGET_DIR_KEYWORD : DEFAULT_TARGET_DIR,
+        METHOD_KEYWORD : SEARCH_METHODS[0],
+        INDEX_KEYWORD : TOGGLE_STATES[0],
+        RECURSIVE_KEYWORD : TOGGLE_STATES[0],
+        ENGINE_KEYWORD : SEARCH_ENGINES[0],
+        CACHE_KEYWORD : '64',  # megabytes, 0 disables the result cache
+        EXECUTOR_KEYWORD : EXECUTOR_MODES[0],
+    }
 
     # ------------------------- #
     # INITIALIZE CONFIGURATIONS #
@@ -170,8 +1856,16 @@ if __name__ == '__main__':
         program_settings = read_settings(SETTINGS_DIR, DEFAULT_SETTINGS_ARGS)
         target_dir = program_settings[TARGET_DIR_KEYWORD]
         search_method = program_settings[METHOD_KEYWORD]
-
-        if not os.path.exists(target_dir) or search_method not in SEARCH_METHODS:
+        index_state = program_settings[INDEX_KEYWORD]
+        recursive_state = program_settings[RECURSIVE_KEYWORD]
+        search_engine = program_settings[ENGINE_KEYWORD]
+        cache_size = program_settings[CACHE_KEYWORD]
+        executor_mode = program_settings[EXECUTOR_KEYWORD]
+
+        invalid_toggles = index_state not in TOGGLE_STATES or recursive_state not in TOGGLE_STATES
+        invalid_cache = not cache_size.isdigit()
+        invalid_executor = executor_mode not in EXECUTOR_MODES
+        if not os.path.exists(target_dir) or search_method not in SEARCH_METHODS or search_engine not in SEARCH_ENGINES or invalid_toggles or invalid_cache or invalid_executor:
             notifications = f"> {PROGRAM.lower()}.conf contained invalid configuration. Generated a default template\n"
     except FileNotFoundError:
         if not os.path.exists(CONFIG_DIR):
@@ -180,6 +1874,12 @@ if __name__ == '__main__':
 
     if notifications:
         target_dir = DEFAULT_TARGET_DIR
+        search_method = SEARCH_METHODS[0]
+        index_state = TOGGLE_STATES[0]
+        recursive_state = TOGGLE_STATES[0]
+        search_engine = SEARCH_ENGINES[0]
+        cache_size = DEFAULT_SETTINGS_ARGS[CACHE_KEYWORD]
+        executor_mode = DEFAULT_SETTINGS_ARGS[EXECUTOR_KEYWORD]
         program_settings = DEFAULT_SETTINGS_ARGS
         if not os.path.exists(DEFAULT_TARGET_DIR):
             os.makedirs(DEFAULT_TARGET_DIR)
@@ -189,49 +1889,751 @@ if __name__ == '__main__':
     # SEARCHER RELATED FUNCTIONS #
     # -------------------------- #
 
-    def parse_search_results(imap_results, results):
-        for output, found in imap_results:
-            if not output or not found:
-                continue
-            print(f"{output.strip()}")
-            results += found
-        return results
+    def acquire_pool(workers):
+        """
+        Return the session-wide worker pool, starting it first if necessary.
+        The pool is only replaced when /t changed the number of workers.
+
+        Return values:
+        * search_pool (Pool)  --  the warmed-up worker pool
+        * warm_up (float)     --  the time spent starting the pool (0 if it was reused)
+        """
+        global search_pool, pool_workers, active_workers
+        active_workers = workers
+        if search_pool is not None and pool_workers == workers:
+            return search_pool, 0
+
+        release_pool()
+        start_time = perf_counter()
+        search_pool = Pool(workers)
+        search_pool.map(pool_ready, range(workers), chunksize=1)
+        pool_workers = workers
+        return search_pool, perf_counter() - start_time
+
+
+    def release_pool():
+        """Shut down the session-wide worker and thread pools (if any)."""
+        global search_pool, pool_workers, thread_pool, thread_workers
+        for pool in (search_pool, thread_pool):
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        search_pool = None
+        pool_workers = 0
+        thread_pool = None
+        thread_workers = 0
+
+
+    def acquire_executor(strategy, workers):
+        """
+        Return the executor of a strategy (see EXECUTOR_STRATEGIES). Every executor has the apply_async()
+        of a Pool, so the searchers don't need to know where they run (see bounded_imap).
+
+        Return values:
+        * executor (Pool, ThreadPool or InlinePool)  --  the executor, started first if necessary
+        * warm_up (float)                            --  the time spent starting it (0 if it was reused)
+        """
+        global thread_pool, thread_workers, active_workers
+        if strategy == 'processes':
+            return acquire_pool(workers)
+        if strategy == 'inline':
+            active_workers = 1
+            return InlinePool(), 0
+
+        active_workers = workers
+        if thread_pool is not None and thread_workers == workers:
+            return thread_pool, 0
+        if thread_pool is not None:
+            thread_pool.terminate()
+            thread_pool.join()
+        start_time = perf_counter()
+        thread_pool = ThreadPool(workers)
+        thread_workers = workers
+        return thread_pool, perf_counter() - start_time
 
 
-    def exact_pool(arguments, workers):
-        results = 0
-        with Pool(workers) as pool:
-            results = parse_search_results(pool.imap_unordered(exact_search, arguments), results)
-        return results
+    def running_executors(workers):
+        """Return the strategies whose executor is already running with the given number of workers."""
+        running = ['inline']
+        if thread_pool is not None and thread_workers == workers:
+            running.append('threads')
+        if search_pool is not None and pool_workers == workers:
+            running.append('processes')
+        return tuple(running)
 
 
-    def approx_pool(arguments, score, workers):
+    def read_calibrations():
+        """Return the saved calibration settings of every number of workers ({} if there are none yet)."""
+        keywords = ['version'] + [keyword for workers in range(1, SYSTEM_CPUS + 1) for keyword in calibration_keywords(workers)]
+        try:
+            settings = read_settings(CALIBRATION_DIR, dict.fromkeys(keywords, ''))
+        except FileNotFoundError:
+            return {}
+        if settings['version'] != str(CALIBRATION_VERSION):
+            return {}
+        return {keyword : value for keyword, value in settings.items() if value}
+
+
+    def calibrate_executors(workers):
+        """
+        Time every strategy on two synthetic corpora (see CALIBRATION_CORPORA), then save the
+        start-up, per-file and per-byte costs of each of them to the calibration file.
+        The calibrations of the other numbers of workers are kept.
+
+        The strategies run on their own executors, so the session-wide pools are left untouched.
+        """
+        print_progress(f"{Tips.FINISH} Calibrating the execution strategies for {Colors.CYAN}({workers}){Colors.RESET} workers")
+
+        settings = read_calibrations()
+        settings['version'] = CALIBRATION_VERSION
+        corpus_dirs = []
+        try:
+            for files, file_size in CALIBRATION_CORPORA:
+                corpus_dirs.append(tempfile.mkdtemp(prefix=f"{PROGRAM.lower()}-calibration-"))
+                write_calibration_corpus(corpus_dirs[-1], files, file_size)
+
+            for strategy in EXECUTOR_STRATEGIES:
+                executor, startup = start_executor(strategy, workers)  # the start-up is part of the measurements
+                runs = []
+                try:
+                    for (files, file_size), corpus_dir in zip(CALIBRATION_CORPORA, corpus_dirs):
+                        arguments = tuple(f"{file}{SEPARATOR}quartzite{SEPARATOR}{corpus_dir}" for file in sorted(os.listdir(corpus_dir)))
+                        timings = []
+                        for _ in range(2):  # the first run also warms up the page cache
+                            start_time = perf_counter()
+                            # The window must match the calibrated workers, not the executor of the last search
+                            for _ in bounded_imap(executor, exact_search, arguments, workers * TASKS_PER_WORKER):
+                                pass
+                            timings.append(perf_counter() - start_time)
+                        runs.append((files, files * file_size, min(timings)))
+                finally:
+                    executor.terminate()
+                    executor.join()
+                file_cost, byte_cost = fit_costs(*runs)
+                settings.update({
+                    f"{strategy}_{cost}_{workers}" : value
+                    for cost, value in zip(CALIBRATION_COSTS, (startup, file_cost, byte_cost))
+                })
+        finally:
+            for corpus_dir in corpus_dirs:
+                shutil.rmtree(corpus_dir, ignore_errors=True)
+
+        write_settings(CALIBRATION_DIR, settings)
+        return parse_calibration({keyword : str(value) for keyword, value in settings.items()}, workers)
+
+
+    def load_calibration(workers):
+        """Return the saved calibration of the executors, measuring it first if it is missing or outdated."""
+        return parse_calibration(read_calibrations(), workers) or calibrate_executors(workers)
+
+
+    def select_executor(search_dir, search_files, searcher, workers, calibration=None):
+        """
+        Pick the execution strategy of a search, from the number and the size of the searched files
+        and the calibration of the executors (None: the strategy forced by /ex is used instead).
+
+        Only the files needed to settle the decision are walked in advance (see choose_strategy),
+        and never more than EXECUTOR_PEEK_FILES of them, so the first results of a large folder
+        don't wait for the whole walk. They are chained back in front of the others so nothing is walked twice.
+
+        Return values:
+        * strategy (str)      --  the chosen (or forced, see /ex) strategy
+        * search_files (iter) --  the same files as the search_files argument
+        """
+        if calibration is None:
+            return executor_mode, search_files
+
+        running = running_executors(workers)
+        strategy, settled = choose_strategy(calibration, 0, 0, searcher, running)
+        remaining_files = iter(search_files)
+        peeked_files = []
+        size = 0
+        while not settled and len(peeked_files) < EXECUTOR_PEEK_FILES:
+            file_name = next(remaining_files, None)
+            if file_name is None:
+                break
+            peeked_files.append(file_name)
+            try:
+                size += os.path.getsize(os.path.join(search_dir, file_name))
+            except OSError:
+                pass
+            strategy, settled = choose_strategy(calibration, len(peeked_files), size, searcher, running)
+        return strategy, chain(peeked_files, remaining_files)
+
+
+    def parse_search_results(imap_results, results, top_results=0, collected=None):
+        """
+        Render the result batches of the search tasks (see exact_search) as they come in.
+
+        Byte ranges of split files are printed in order, once all of their predecessors are in,
+        so that their relative line numbers can be shifted by the line count of those predecessors.
+
+        With top_results, the ranked hits of every batch (see approximate_hits) are gathered instead,
+        regularly trimmed down to the best top_results, and only those are printed at the end.
+        If collected is given, the hits of every file are also gathered into it, as {file_name : [hits]}.
+
+        Once result_limit results were printed (see /limit), the remaining batches are left unread,
+        so that the caller can cancel the tasks that are still queued (see searcher_pool).
+        With files_only, only the name of every file with a hit is printed, and counted as one result.
+        """
+        ranking = []
+        emitted = 0
+        matched_files = set()
+
+        def emit(file_name, hits, line_offset=0):
+            nonlocal emitted
+            if result_limit and not top_results:
+                hits = hits[:result_limit - emitted]
+                if not hits:
+                    return 0
+            emitted += len(hits)
+            if collected is not None:
+                collected.setdefault(file_name, []).extend((index + line_offset, *hit) for index, *hit in hits)
+            if not top_results:
+                print(render_hits(file_name, hits, line_offset))
+                return len(hits)
+            for index, line, score, ratio in hits:
+                # Ties are broken on the file name & line (alphabetically, then in line order),
+                # never on the completion order of the tasks
+                ranking.append(((-ratio, file_name, index + line_offset), line, score))
+            if len(ranking) >= 2 * top_results:
+                ranking[:] = nsmallest(top_results, ranking)
+            return len(hits)
+
+        split_files = {}
+        for file_name, part, line_count, hits in imap_results:
+            if files_only:
+                if hits and file_name not in matched_files:
+                    matched_files.add(file_name)
+                    print(json_file(json_query, file_name) if json_query is not None else format_file(file_name, PLAIN_OUTPUT))
+                    results += 1
+            elif part is not None:
+                results += merge_range_result(split_files, file_name, part, line_count, hits, emit)
+            elif hits:
+                results += emit(file_name, hits)
+            if result_limit and not top_results and results >= result_limit:
+                break
+
+        if not top_results:
+            return results
+        ranking = sorted(ranking)[:top_results][:result_limit or None]
+        for (_, file_name, index), line, score in ranking:
+            print(render_hits(file_name, ((index, line, score),)))
+        return len(ranking)
+
+
+    def render_hits(file_name, hits, line_offset=0):
+        """Format a whole batch of hits at once."""
+        if json_query is not None:
+            return ''.join(
+                json_hit(json_query, file_name, index + line_offset, line, score, *patterns)
+                for index, line, score, *patterns in hits
+            ).rstrip('\n')
+        return ''.join(
+            format_hit(file_name, index + line_offset, line, score, PLAIN_OUTPUT, *patterns)
+            for index, line, score, *patterns in hits
+        ).rstrip('\n')
+
+
+    def merge_range_result(split_files, file_name, part, line_count, hits, emit):
+        """Queue the result of range_search() and emit every range that is now in order."""
+        split_state = split_files.setdefault(file_name, {'next_part' : 0, 'line_offset' : 0, 'pending' : {}})
+        split_state['pending'][part] = (line_count, hits)
+
+        found = 0
+        while split_state['next_part'] in split_state['pending']:
+            line_count, hits = split_state['pending'].pop(split_state['next_part'])
+            if hits:
+                found += emit(file_name, hits, split_state['line_offset'])
+            split_state['line_offset'] += line_count
+            split_state['next_part'] += 1
+        return found
+
+
+    def stream_tasks(pool, function, arguments):
+        """Feed the (lazy) arguments into the pool while keeping a bounded number of tasks in flight."""
+        return bounded_imap(pool, function, arguments, active_workers * TASKS_PER_WORKER)
+
+
+    def search_tasks(search_dir, search_files, searcher, query, score, top_results=0, search_stats=None, counting=False):
+        """
+        Yield the (function, arguments) pair of every search task.
+
+        Files larger than SPLIT_THRESHOLD are split into newline-aligned byte ranges
+        so that several workers can search them in parallel (see range_search).
+        The files of the upcoming tasks are read into the page cache by a few I/O threads
+        while the workers are still busy with the current ones (see read_ahead).
+        The size of every task is recorded in search_stats (see new_search_stats).
+
+        With /limit, no task needs to find more hits than the limit itself, and with files_only
+        the first hit of a file is enough (ranked approximate searches must read every line).
+        With counting, every task only returns the number of its hits (see count_search).
+        """
+        max_hits = 0 if counting or top_results else 1 if files_only else result_limit
+        task_bytes = {} if search_stats is None else search_stats['task_bytes']
+        whole_file_searchers = {'exact' : exact_search, 'mmap' : mmap_search, 'multi' : multi_search, 'regex' : regex_search, 'approx' : approximate_search}
+
+        def planned_tasks():
+            for file in search_files:
+                file_dir = os.path.join(search_dir, file)
+                size = os.path.getsize(file_dir)
+                # Compressed files can only be read from the beginning, so they are never split
+                if size <= SPLIT_THRESHOLD or compressed_opener(file) is not None:
+                    task_bytes[(file, None)] = size
+                    if counting:
+                        count_args = (searcher, file, query, search_dir, str(score), '', '', '')
+                        yield (file_dir, 0, 0), (count_search, SEPARATOR.join(count_args))
+                        continue
+                    arguments = f"{file}{SEPARATOR}{query}{SEPARATOR}{search_dir}"
+                    if searcher == 'approx':
+                        arguments = f"{arguments}{SEPARATOR}{score}{SEPARATOR}{top_results}"
+                    if max_hits:
+                        arguments = f"{arguments}{SEPARATOR}{max_hits}"
+                    yield (file_dir, 0, 0), (whole_file_searchers[searcher], arguments)
+                    continue
+                for part, (start, end) in enumerate(plan_ranges(file_dir, size)):
+                    task_bytes[(file, part)] = end - start
+                    if counting:
+                        count_args = (searcher, file, query, search_dir, str(score), str(start), str(end), str(part))
+                        yield (file_dir, start, end - start), (count_search, SEPARATOR.join(count_args))
+                        continue
+                    range_args = (searcher, file, query, search_dir, str(score), str(start), str(end), str(part), str(top_results), str(max_hits))
+                    yield (file_dir, start, end - start), (range_search, SEPARATOR.join(range_args))
+
+        lookahead = active_workers * TASKS_PER_WORKER
+        prefetched = read_ahead(planned_tasks(), lambda task: advise_willneed(*task[0]), lookahead, READ_AHEAD_THREADS)
+        for _, task in prefetched:
+            yield task
+
+
+    def new_search_stats():
+        """
+        Return an empty set of search statistics, filled in by searcher_pool().
+
+        * io_wait, compute (float)  --  the total I/O-wait and compute time of the workers (see timed_task)
+        * workers (dict)            --  {(pid, thread id) : {'tasks', 'bytes', 'lines', 'io_wait', 'compute'}}
+        * tasks (list)              --  [(wall time, file_name, part, bytes, lines, io_wait, compute)]
+        * task_bytes (dict)         --  {(file_name, part) : bytes} of the queued tasks (see search_tasks)
+        """
+        return {'io_wait' : 0.0, 'compute' : 0.0, 'workers' : {}, 'tasks' : [], 'task_bytes' : {}}
+
+
+    def record_task(search_stats, result, worker_id, io_wait, compute):
+        """Add the statistics of a finished search task to search_stats."""
+        file_name, part, line_count, _ = result
+        scanned = search_stats['task_bytes'].pop((file_name, part), 0)
+        search_stats['io_wait'] += io_wait
+        search_stats['compute'] += compute
+        worker = search_stats['workers'].setdefault(worker_id, {'tasks' : 0, 'bytes' : 0, 'lines' : 0, 'io_wait' : 0.0, 'compute' : 0.0})
+        worker['tasks'] += 1
+        worker['bytes'] += scanned
+        worker['lines'] += line_count
+        worker['io_wait'] += io_wait
+        worker['compute'] += compute
+        search_stats['tasks'].append((io_wait + compute, file_name, part, scanned, line_count, io_wait, compute))
+
+
+    def searcher_pool(tasks, pool, top_results=0, search_stats=None, cached_results=None, collected=None):
+        """
+        Run the search tasks while recording how every worker spent its time (see record_task).
+        The cached_results (a deque filled by cached_searcher_pool while the tasks are planned)
+        are rendered in between the task results, as if they came from the pool.
+
+        If parse_search_results() stops early (see /limit), the tasks that haven't been queued
+        are dropped and the files they would have read ahead are left alone.
+        """
+        cached_results = deque() if cached_results is None else cached_results
+
+        def timed_results():
+            for result, (worker_id, io_wait, compute) in stream_tasks(pool, timed_task, tasks):
+                while cached_results:
+                    yield cached_results.popleft()
+                if search_stats is not None:
+                    record_task(search_stats, result, worker_id, io_wait, compute)
+                yield result
+            while cached_results:
+                yield cached_results.popleft()
+
         results = 0
-        with Pool(workers) as pool:
-            results = parse_search_results(pool.imap_unordered(approximate_search, arguments), results)
+        task_results = timed_results()
+        try:
+            results = parse_search_results(task_results, results, top_results, collected)
+        finally:
+            task_results.close()
+            tasks.close()
         return results
 
 
-    def searchers_wrapper(search_dir, method, query, score, threads):
-        arguments = []
+    def count_pool(search_dir, search_files, searcher, query, score, pool, search_stats=None):
+        """
+        Count the hits of every file (see count_search) and print them as a histogram,
+        sorted from the file with the most hits to the one with the fewest.
+        The counts of split files are summed, and files without any hit are left out.
+
+        Return values:
+        * results (int)  --  the total number of hits
+        """
+        tasks = search_tasks(search_dir, search_files, searcher, query, score, search_stats=search_stats, counting=True)
+        counts = {}
+        for result, (worker_id, io_wait, compute) in stream_tasks(pool, timed_task, tasks):
+            if search_stats is not None:
+                record_task(search_stats, result, worker_id, io_wait, compute)
+            file_name, _, _, count = result
+            if count:
+                counts[file_name] = counts.get(file_name, 0) + count
+
+        histogram = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        largest = histogram[0][1] if histogram else 0
+        for file_name, count in histogram:
+            if json_query is not None:
+                print(json_count(json_query, file_name, count))
+            else:
+                print(format_count(file_name, count, largest, PLAIN_OUTPUT))
+        return sum(counts.values())
+
+
+    def cached_searcher_pool(search_dir, search_files, searcher, query, score, pool, top_results=0, search_stats=None):
+        """
+        Search the files through the query result cache (see load_cached_results).
+
+        Every file is fingerprinted as its task is planned, so the walk stays lazy: the cached
+        results of the unchanged files are rendered in between the others, and only the new or
+        modified files are searched again. The updated entry is written back if anything changed.
+
+        Return values:
+        * results (int)       --  the number of results
+        * cached_files (int)  --  the number of files whose results came from the cache
+
+        Counts (see /count) are never cached, as they can't be told apart from the hits themselves.
+        """
+        if count_mode:
+            return count_pool(search_dir, search_files, searcher, query, score, pool, search_stats), 0
+
+        cache_limit = int(cache_size) * 1024 * 1024
+        if not cache_limit:
+            tasks = search_tasks(search_dir, search_files, searcher, query, score, top_results, search_stats)
+            return searcher_pool(tasks, pool, top_results, search_stats), 0
+
+        # Only the approximate searcher reads the score, so changing /s keeps the other entries
+        cache_score = float(score) if searcher == 'approx' else None
+        cache_key = (os.path.realpath(search_dir), recursive_state, searcher, query, cache_score, top_results)
+        entry = load_cached_results(CACHE_DIR, cache_key)
+        cached_results = deque()
+        fingerprints = {}
+        reused_files = {}
+        stale_files = []
+
+        def planned_files():
+            for file_name in search_files:
+                try:
+                    fingerprints[file_name] = file_fingerprint(os.path.join(search_dir, file_name))
+                except OSError:
+                    continue
+                cached = entry['files'].get(file_name)
+                if cached is not None and cached[0] == fingerprints[file_name]:
+                    reused_files[file_name] = cached
+                    cached_results.append((file_name, None, 0, cached[1]))
+                    continue
+                stale_files.append(file_name)
+                yield file_name
+
+        collected = {}
+        tasks = search_tasks(search_dir, planned_files(), searcher, query, score, top_results, search_stats)
+        results = searcher_pool(tasks, pool, top_results, search_stats, cached_results, collected)
+
+        # The hits of a limited search are incomplete (and its walk may have been cut short), so they must not be cached
+        removed_files = len(entry['files']) != len(reused_files)
+        if (stale_files or removed_files) and not (result_limit or files_only):
+            entry['files'] = dict(reused_files)
+            for file_name in stale_files:
+                entry['files'][file_name] = (fingerprints[file_name], collected.get(file_name, []))
+            save_cached_results(CACHE_DIR, entry, cache_limit)
+        return results, len(reused_files)
+
+
+    def index_pool(search_dir, pool, rebuild=False, indexer=index_file, extension='idx'):
+        """
+        Bring an index of search_dir (the trigram index or the vocabulary) up to date and return it.
+        The index is kept in loaded_indexes, and only written back to the disk when some files changed.
+        """
+        index_key = (os.path.realpath(search_dir), extension)
+        if index_key not in loaded_indexes:
+            loaded_indexes[index_key] = load_index(INDEX_DIR, search_dir, extension)
+        index = loaded_indexes[index_key]
+        if rebuild:
+            index['files'] = {}
+        stale_files, removed_files = stale_index_files(index, search_dir, recursive_state == 'enabled')
+        if not stale_files and not removed_files:
+            return index
+
+        start_time = perf_counter()
+        for file_name in removed_files:
+            del index['files'][file_name]
+        if stale_files:
+            arguments = (f"{file}{SEPARATOR}{search_dir}" for file in stale_files)
+            for file_name, signature, postings in stream_tasks(pool, indexer, arguments):
+                index['files'][file_name] = (signature, postings)
+        save_index(INDEX_DIR, search_dir, index, extension)
+        end_time = perf_counter()
+
+        if stale_files:
+            index_name = 'Indexed' if extension == 'idx' else 'Updated the vocabulary of'
+            print_progress(f"{Tips.FINISH} {index_name} {Colors.CYAN}{len(stale_files)}{Colors.RESET} file(s) in {Colors.CYAN}{end_time - start_time:.5f}{Colors.RESET} seconds")
+        return index
+
+
+    def compressed_tasks(search_dir, search_files, searcher, query, score, top_results=0, search_stats=None):
+        """Yield the full scan tasks of the compressed files, which the search indexes don't cover (see stale_index_files)."""
+        compressed_files = (file for file in search_files if compressed_opener(file) is not None)
+        return search_tasks(search_dir, compressed_files, searcher, query, score, top_results, search_stats)
+
+
+    def indexed_pool(search_dir, search_files, searcher, query, pool, search_stats=None):
+        """
+        Search only the candidate lines returned by the index. Return None if the index can't be used.
+        The compressed files of search_files are scanned as usual, and their results merged in.
+        """
+        index = index_pool(search_dir, pool)
+        candidates = index_candidates(index, query)
+        if candidates is None:
+            return None
+
+        def tasks():
+            for file, lines in candidates.items():
+                yield indexed_search, f"{file}{SEPARATOR}{query}{SEPARATOR}{search_dir}{SEPARATOR}{','.join(map(str, lines))}"
+            yield from compressed_tasks(search_dir, search_files, searcher, query, 0, search_stats=search_stats)
+
+        return searcher_pool(tasks(), pool, search_stats=search_stats)
+
+
+    def vocabulary_pool(search_dir, search_files, query, score, pool, top_results=0, search_stats=None):
+        """
+        Score every distinct word of the vocabulary once, then only print the lines containing the best ones.
+        With top_results, only the best top_results lines are read back from the files.
+        The compressed files of search_files are scanned as usual, and their results merged in.
+        """
+        vocabulary = index_pool(search_dir, pool, indexer=vocabulary_file, extension='voc')
+        distinct_words = set()
+        for _, postings in vocabulary['files'].values():
+            distinct_words.update(postings)
+        distinct_words = tuple(distinct_words)
+
+        scores = {}
+        arguments = (
+            SEPARATOR.join((query, str(score), '\n'.join(distinct_words[i:i + VOCABULARY_BATCH])))
+            for i in range(0, len(distinct_words), VOCABULARY_BATCH)
+        )
+        for word_scores in stream_tasks(pool, score_words, arguments):
+            scores.update(word_scores)
+
+        candidates = vocabulary_candidates(vocabulary, scores)
+        if top_results:
+            candidates = top_candidates(candidates, scores, top_results)
+
+        def tasks():
+            for file, best_words in candidates.items():
+                yield vocabulary_search, SEPARATOR.join((
+                    file, query, search_dir,
+                    '\n'.join(f"{line_number} {word}" for line_number, word in best_words.items()),
+                    '1' if top_results else '0'
+                ))
+            yield from compressed_tasks(search_dir, search_files, 'approx', query, score, top_results, search_stats)
+
+        return searcher_pool(tasks(), pool, top_results, search_stats)
+
+
+    def multi_patterns(query):
+        """
+        Split a multi-pattern query into its patterns: 'first|second|...', or '@file' with one pattern per line.
+        Patterns that only differ by their letter case are only kept once.
+        """
+        if query.startswith('@'):
+            with open(os.path.expanduser(query[1:].strip()), 'r', encoding='utf8') as patterns_file:
+                patterns = patterns_file.read().split('\n')
+        else:
+            patterns = query.split('|')
+
+        unique_patterns = {}
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if pattern:
+                unique_patterns.setdefault(pattern.lower(), pattern)
+        return tuple(unique_patterns.values())
+
+
+    def searchers_wrapper(search_dir, method, query, score, threads, search_files=None):
+        """
+        Search the directory, print the results followed by a summary and return the number of results.
+        The batch mode walks the directory once and passes the same search_files to every query.
+        """
+        calibration = load_calibration(threads) if executor_mode == 'auto' else None
         start_time = perf_counter()
-        
+
+        # Without the result cache, files are fed to the pool while the directory is still being walked
+        if search_files is None:
+            search_files = walk_files(search_dir, recursive_state == 'enabled', SEARCHED_EXTENSIONS)
+        searchers = {'exact_match' : 'mmap' if search_engine == 'mmap' else 'exact', 'multi_match' : 'multi', 'regex_match' : 'regex', 'proximity_match' : 'approx'}
+        strategy, search_files = select_executor(search_dir, search_files, searchers[method], threads, calibration)
+        pool, warm_up = acquire_executor(strategy, threads)
+        start_time += warm_up  # the start-up of the executor is reported on its own
+        search_stats = new_search_stats()
+        cached_files = 0
         if method == 'exact_match':
-            for file in os.listdir(search_dir):
-                arguments.append(f"{file}{SEPARATOR}{query}{SEPARATOR}{search_dir}")
-            arguments = tuple(arguments)
-            results = exact_pool(arguments, threads)
+            results = None
+            if index_state == 'enabled' and not count_mode:
+                # Queries shorter than a trigram can't use the index
+                results = indexed_pool(search_dir, search_files, searchers[method], query, pool, search_stats)
+            if results is None:
+                results, cached_files = cached_searcher_pool(search_dir, search_files, searchers[method], query, score, pool, search_stats=search_stats)
+            end_time = perf_counter()
+        elif method == 'multi_match':
+            try:
+                patterns = multi_patterns(query)
+            except OSError:
+                print_error(f"{query[1:].strip()} couldn't be read")
+                return 0
+            if not patterns:
+                print_error("The query doesn't contain any pattern")
+                return 0
+            patterns = '\n'.join(patterns)
+            results, cached_files = cached_searcher_pool(search_dir, search_files, 'multi', patterns, score, pool, search_stats=search_stats)
+            end_time = perf_counter()
+        elif method == 'regex_match':
+            try:
+                compile_regex(query)
+            except re.error as error:
+                print_error(f"Invalid regular expression: {error}")
+                return 0
+            results, cached_files = cached_searcher_pool(search_dir, search_files, 'regex', query, score, pool, search_stats=search_stats)
             end_time = perf_counter()
         elif method == 'proximity_match':
-            for file in os.listdir(search_dir):
-                arguments.append(f"{file}{SEPARATOR}{query}{SEPARATOR}{search_dir}{SEPARATOR}{score}")
-            arguments = tuple(arguments)
-            results = approx_pool(arguments, score, threads)
+            # File names can't be ranked
+            ranked = 0 if files_only else top_results
+            if index_state == 'enabled' and not count_mode:
+                results = vocabulary_pool(search_dir, search_files, query, score, pool, ranked, search_stats)
+            else:
+                results, cached_files = cached_searcher_pool(search_dir, search_files, 'approx', query, score, pool, ranked, search_stats)
             end_time = perf_counter()
 
-        print(f"\n{Tips.FINISH} Found {Colors.CYAN}{results}{Colors.RESET} results")
-        print(f"{Tips.FINISH} Finished in {Colors.CYAN}{end_time - start_time:.5f}{Colors.RESET} seconds with {Colors.CYAN}({threads}){Colors.RESET} processors")
-        print(f"-" * len(f"$$ Finished in {end_time - start_time:.5f} seconds with ({threads}) processors") + '\n')
+        global last_search
+        last_search = {
+            'query' : query, 'method' : method, 'results' : results,
+            'seconds' : end_time - start_time, 'warm_up' : warm_up, 'processors' : threads,
+            'executor' : strategy, 'executor_mode' : 'auto' if calibration else 'forced',
+            'limit' : result_limit, 'files_only' : files_only, 'count' : count_mode,
+            'io_wait' : search_stats['io_wait'], 'compute' : search_stats['compute'], 'cached_files' : cached_files,
+        }
+        if json_query is not None:
+            summary = dict(last_search)
+            if json_stats:
+                summary.update(stats_report(search_stats))
+            print(json.dumps({'summary' : summary}, ensure_ascii=False))
+        last_search['stats'] = search_stats
+        if json_query is not None:
+            return results
+
+        if count_mode:
+            print_summary(f"\n{Tips.FINISH} Counted {Colors.CYAN}{results}{Colors.RESET} matching lines in total")
+        else:
+            found = 'file(s) with matches' if files_only else 'results'
+            stopped = f" (stopped at the limit of {result_limit})" if result_limit and results >= result_limit else ''
+            print_summary(f"\n{Tips.FINISH} Found {Colors.CYAN}{results}{Colors.RESET} {found}{stopped}")
+        if warm_up:
+            print_summary(f"{Tips.FINISH} Started the {'thread' if strategy == 'threads' else 'worker'} pool in {Colors.CYAN}{warm_up:.5f}{Colors.RESET} seconds")
+        if cached_files:
+            print_summary(f"{Tips.FINISH} Reused the cached results of {Colors.CYAN}{cached_files}{Colors.RESET} unchanged file(s)")
+        worker_time = search_stats['io_wait'] + search_stats['compute']
+        if worker_time:
+            io_share = search_stats['io_wait'] / worker_time * 100
+            print_summary(
+                f"{Tips.FINISH} Workers spent {Colors.CYAN}{search_stats['io_wait']:.5f}{Colors.RESET} seconds ({io_share:.1f}%) waiting for I/O"
+                f" and {Colors.CYAN}{search_stats['compute']:.5f}{Colors.RESET} seconds ({100 - io_share:.1f}%) searching"
+            )
+        executor = executor_label(last_search)
+        print_summary(f"{Tips.FINISH} Finished in {Colors.CYAN}{end_time - start_time:.5f}{Colors.RESET} seconds {executor}")
+        print_summary(f"-" * len(f"$$ Finished in {end_time - start_time:.5f} seconds {executor}") + '\n')
+        return results
+
+
+    def print_error(message):
+        """Print why a query couldn't be searched, as a JSON object in the batch JSON mode (see json_error)."""
+        if json_query is not None:
+            print(json_error(json_query, message))
+        else:
+            print(f"{Tips.ERROR} {message}")
+
+
+    def print_summary(text):
+        """Print a line of the summary of a search, without colors when the output is plain (see PLAIN_OUTPUT)."""
+        print(uncolored(text) if PLAIN_OUTPUT else text)
+
+
+    def print_progress(text):
+        """
+        Print a progress note (e.g. the indexing time). In the batch JSON mode, it goes to stderr
+        to keep the JSON output parsable. Either way, it has no colors when the output is plain or JSON.
+        """
+        output = sys.stdout if json_query is None else sys.stderr
+        print(uncolored(text) if PLAIN_OUTPUT or json_query is not None else text, file=output)
+
+
+    def executor_label(search):
+        """Describe where a search ran, e.g. 'with (4) processes (auto)' or 'inline (forced)'."""
+        if search['executor'] == 'inline':
+            return f"inline ({search['executor_mode']})"
+        return f"with ({search['processors']}) {search['executor']} ({search['executor_mode']})"
+
+
+    def stats_report(search_stats, slowest=SLOWEST_FILES):
+        """
+        Summarize the statistics of a search (see new_search_stats).
+
+        Return values:
+        * report (dict)  --  {'bytes', 'lines', 'workers' : [per-worker totals], 'slowest_files' : [the slowest tasks]}
+        """
+        workers = [dict(worker, pid=pid, thread=thread) for (pid, thread), worker in sorted(search_stats['workers'].items())]
+        slowest_tasks = sorted(search_stats['tasks'], key=lambda task: task[0], reverse=True)[:slowest]
+        return {
+            'bytes' : sum(worker['bytes'] for worker in workers),
+            'lines' : sum(worker['lines'] for worker in workers),
+            'workers' : workers,
+            'slowest_files' : [
+                {'file' : file_name, 'part' : part, 'seconds' : seconds, 'bytes' : scanned, 'lines' : lines, 'io_wait' : io_wait, 'compute' : compute}
+                for seconds, file_name, part, scanned, lines, io_wait, compute in slowest_tasks
+            ],
+        }
+
+
+    def print_stats(search):
+        """Print the detailed report of a search (see searchers_wrapper)."""
+        report = stats_report(search['stats'])
+        megabytes = report['bytes'] / 1024 / 1024
+        print(f"Last search: {Colors.CYAN}{search['query']}{Colors.RESET} ({search['method']}, {search['results']} results)")
+        print(f"  wall time      : {search['seconds']:.5f} seconds {executor_label(search)}")
+        print(f"  pool start-up  : {search['warm_up']:.5f} seconds")
+        print(f"  cached files   : {search['cached_files']}")
+        print(f"  scanned        : {megabytes:.2f} MB, {report['lines']} lines in {len(search['stats']['tasks'])} task(s)")
+        print(f"  worker time    : {search['io_wait']:.5f} seconds of I/O, {search['compute']:.5f} seconds of matching")
+        if not report['workers']:
+            print("  (no per-worker statistics: everything came from the cache or the search indexes)")
+            return
+
+        print("Workers:")
+        # The threads of the thread pool (and inline searches) all share the pid of the main process
+        shared_pid = len({worker['pid'] for worker in report['workers']}) < len(report['workers'])
+        for worker in report['workers']:
+            label = f"thread {worker['thread']}" if shared_pid else f"pid {worker['pid']:<8}"
+            print(
+                f"  {label}: {worker['tasks']} task(s), {worker['bytes'] / 1024 / 1024:.2f} MB, {worker['lines']} lines, "
+                f"I/O {worker['io_wait']:.5f}s, matching {worker['compute']:.5f}s"
+            )
+        print("Slowest files:")
+        for rank, task in enumerate(report['slowest_files'], start=1):
+            part = '' if task['part'] is None else f" (part {task['part']})"
+            print(
+                f"  {rank:>2}. {task['file']}{part}: {task['seconds']:.5f}s, {task['bytes'] / 1024 / 1024:.2f} MB, {task['lines']} lines, "
+                f"I/O {task['io_wait']:.5f}s, matching {task['compute']:.5f}s"
+            )
 
     # -------------------------- #
     # COMMANDS RELATED FUNCTIONS #
@@ -258,21 +2660,120 @@ if __name__ == '__main__':
 
     def mt_command(usr_input):
         usr_input = usr_input.lstrip('/mt').strip()
-        VALID_ARGS = ('-p', '--proximity', '-e', '--exact', '')
+        VALID_ARGS = ('-p', '--proximity', '-e', '--exact', '-m', '--multi', '-r', '--regex')
         if usr_input not in VALID_ARGS:
             print(f"{Tips.ERROR} Invalid argument for /mt [method]")
             return 'invalid'
 
-        if usr_input in VALID_ARGS[0:1]:
+        if usr_input in VALID_ARGS[0:2]:
             method = 'proximity_match'
         elif usr_input in VALID_ARGS[2:4]:
             method = 'exact_match'
-        
+        elif usr_input in VALID_ARGS[4:6]:
+            method = 'multi_match'
+        elif usr_input in VALID_ARGS[6:8]:
+            method = 'regex_match'
+
         program_settings[METHOD_KEYWORD] = method
         write_settings(SETTINGS_DIR, program_settings)
         return method
 
 
+    def en_command(usr_input, current_engine):
+        usr_input = usr_input.lstrip('/en').strip()
+        VALID_ARGS = ('-l', '--line', '-m', '--mmap', '')
+        if usr_input not in VALID_ARGS:
+            print(f"{Tips.ERROR} Invalid argument for /en [engine]")
+            return current_engine
+
+        if usr_input in VALID_ARGS[0:2]:
+            engine = 'line'
+        elif usr_input in VALID_ARGS[2:4]:
+            engine = 'mmap'
+        else:
+            print(f"Exact match engine is currently {current_engine}")
+            return current_engine
+
+        program_settings[ENGINE_KEYWORD] = engine
+        write_settings(SETTINGS_DIR, program_settings)
+        print(f"Set the exact match engine to {engine}")
+        return engine
+
+
+    def ex_command(usr_input, current_mode):
+        usr_input = usr_input.lstrip('/ex').strip()
+        VALID_ARGS = ('-a', '--auto', '-i', '--inline', '-t', '--threads', '-p', '--processes', '-c', '--calibrate', '')
+        if usr_input not in VALID_ARGS:
+            print(f"{Tips.ERROR} Invalid argument for /ex [executor]")
+            return current_mode
+
+        if usr_input in VALID_ARGS[8:10]:
+            calibration = calibrate_executors(allocated_threads)
+            for strategy, (startup, file_cost, byte_cost) in calibration.items():
+                print(f"  {strategy:<10}: {startup:.5f}s start-up, {file_cost * 1000:.3f}ms per file, {1 / byte_cost / 1024 / 1024:.1f} MB/s")
+            return current_mode
+        if usr_input == '':
+            state = 'chosen automatically' if current_mode == 'auto' else f"forced to {current_mode}"
+            print(f"The execution strategy is currently {state}")
+            return current_mode
+
+        new_mode = EXECUTOR_MODES[VALID_ARGS.index(usr_input) // 2]
+        program_settings[EXECUTOR_KEYWORD] = new_mode
+        write_settings(SETTINGS_DIR, program_settings)
+        if new_mode == 'auto':
+            print("Execution strategy set to automatic (see /ex --calibrate)")
+        else:
+            print(f"Forced the execution strategy to {new_mode}")
+        return new_mode
+
+
+    def ix_command(usr_input, current_state):
+        usr_input = usr_input.lstrip('/ix').strip()
+        VALID_ARGS = ('-e', '--enable', '-d', '--disable', '-r', '--rebuild', '')
+        if usr_input not in VALID_ARGS:
+            print(f"{Tips.ERROR} Invalid argument for /ix [option]")
+            return current_state
+
+        if usr_input in VALID_ARGS[0:2]:
+            new_state = 'enabled'
+        elif usr_input in VALID_ARGS[2:4]:
+            new_state = 'disabled'
+            loaded_indexes.clear()
+        elif usr_input in VALID_ARGS[4:6]:
+            pool, _ = acquire_pool(allocated_threads)
+            index_pool(target_dir, pool, rebuild=True)
+            index_pool(target_dir, pool, rebuild=True, indexer=vocabulary_file, extension='voc')
+            return current_state
+        else:
+            print(f"Search indexes are currently {current_state}")
+            return current_state
+
+        program_settings[INDEX_KEYWORD] = new_state
+        write_settings(SETTINGS_DIR, program_settings)
+        print(f"Search indexes {new_state}")
+        return new_state
+
+
+    def r_command(usr_input, current_state):
+        usr_input = usr_input.lstrip('/r').strip()
+        VALID_ARGS = ('-e', '--enable', '-d', '--disable', '')
+        if usr_input not in VALID_ARGS:
+            print(f"{Tips.ERROR} Invalid argument for /r [option]")
+            return current_state
+
+        if usr_input in VALID_ARGS[0:2]:
+            new_state = 'enabled'
+        elif usr_input in VALID_ARGS[2:4]:
+            new_state = 'disabled'
+        else:
+            new_state = 'disabled' if current_state == 'enabled' else 'enabled'
+
+        program_settings[RECURSIVE_KEYWORD] = new_state
+        write_settings(SETTINGS_DIR, program_settings)
+        print(f"Recursive search {new_state}")
+        return new_state
+
+
     def s_command(usr_input, current_score):
         usr_input = usr_input.lstrip('/s').strip()
         try:
@@ -289,6 +2790,103 @@ if __name__ == '__main__':
         return current_score
 
 
+    def top_command(usr_input, current_top):
+        usr_input = usr_input.lstrip('/top').strip()
+        if usr_input in ('', '0'):
+            print("Printing every approximate match")
+            return 0
+        try:
+            if int(usr_input) < 0:
+                print(f"{Tips.ERROR} /top [number] must be greater than or equal to 0")
+                return current_top
+        except ValueError:
+            print(f"{Tips.ERROR} Invalid parameter for /top [number]")
+            return current_top
+        print(f"Printing only the {int(usr_input)} best approximate matches")
+        return int(usr_input)
+
+
+    def limit_command(usr_input, current_limit, current_files_only):
+        usr_input = usr_input[len('/limit'):].strip()
+        if usr_input in ('-l', '--files'):
+            if current_files_only:
+                print("Printing every matching line")
+            else:
+                print("Printing only the names of the files with matches")
+            return current_limit, not current_files_only
+        if usr_input == '':
+            limit = f"stop after {current_limit} results" if current_limit else "print every result"
+            output = 'the names of the files with matches' if current_files_only else 'every matching line'
+            print(f"Searches currently {limit} and print {output}")
+            return current_limit, current_files_only
+        if not usr_input.isdigit():
+            print(f"{Tips.ERROR} Invalid parameter for /limit [number]")
+            return current_limit, current_files_only
+
+        new_limit = int(usr_input)
+        if new_limit:
+            print(f"Stopping every search after {new_limit} results")
+        else:
+            print("Removed the result limit")
+        return new_limit, current_files_only
+
+
+    def count_command(usr_input, current_mode):
+        usr_input = usr_input[len('/count'):].strip()
+        VALID_ARGS = ('-e', '--enable', '-d', '--disable', '')
+        if usr_input not in VALID_ARGS:
+            print(f"{Tips.ERROR} Invalid argument for /count [option]")
+            return current_mode
+
+        if usr_input in VALID_ARGS[0:2]:
+            new_mode = True
+        elif usr_input in VALID_ARGS[2:4]:
+            new_mode = False
+        else:
+            new_mode = not current_mode
+
+        if new_mode:
+            print("Counting the matching lines of every file")
+        else:
+            print("Printing the search results")
+        return new_mode
+
+
+    def stats_command(usr_input):
+        usr_input = usr_input[len('/stats'):].strip()
+        if usr_input not in ('last', ''):
+            print(f"{Tips.ERROR} Invalid argument for /stats [last]")
+            return
+        if last_search is None:
+            print(f"{Tips.ERROR} There is no search to report on yet")
+            return
+        print_stats(last_search)
+
+
+    def ca_command(usr_input, current_size):
+        usr_input = usr_input.lstrip('/ca').strip()
+        if usr_input in ('-c', '--clear'):
+            print(f"Deleted {clear_cached_results(CACHE_DIR)} cached search result(s)")
+            return current_size
+        if usr_input == '':
+            state = 'disabled' if current_size == '0' else f"limited to {current_size} MB"
+            print(f"The search result cache is currently {state}")
+            return current_size
+        if not usr_input.isdigit():
+            print(f"{Tips.ERROR} Invalid argument for /ca [size]")
+            return current_size
+
+        new_size = str(int(usr_input))
+        program_settings[CACHE_KEYWORD] = new_size
+        write_settings(SETTINGS_DIR, program_settings)
+        if new_size == '0':
+            clear_cached_results(CACHE_DIR)
+            print("Search result cache disabled")
+        else:
+            print(f"Limited the search result cache to {new_size} MB")
+        return new_size
+
+
     def cd_command(usr_input, current_dir):
         usr_input = usr_input.lstrip('/cd').strip()
         try:
@@ -322,6 +2920,109 @@ if __name__ == '__main__':
             print(f"{Tips.ERROR} Invalid value for /ls [dir]")
         return ls_column
 
+    # ----------------- #
+    # BATCH SEARCH MODE #
+    # ----------------- #
+
+    def parse_batch_args(argv):
+        """Parse the command line of the non-interactive mode. The saved settings are used as defaults."""
+        parser = ArgumentParser(
+            prog=os.path.basename(sys.argv[0]),
+            description=f"{PROGRAM} batch mode: run one or more searches without the interactive prompt",
+        )
+        parser.add_argument('--dir', default=target_dir, help='the search directory (default: the saved target directory)')
+        parser.add_argument('--method', choices=('exact', 'proximity', 'multi', 'regex'), help='the search method (default: the saved method)')
+        parser.add_argument('--query', action='append', default=[], help='a search query (can be repeated)')
+        parser.add_argument('--queries', metavar='FILE', help="a file with one query per line ('-' reads standard input)")
+        parser.add_argument('--score', type=float, default=float(approx_score), help='the minimum score of approximate matches')
+        parser.add_argument('--top', type=int, default=0, help='only print the best approximate matches of each query')
+        parser.add_argument('--limit', type=int, default=0, help='stop each query after that many results (default: no limit)')
+        parser.add_argument('-l', '--files-with-matches', action='store_true', help='only print the names of the files with matches')
+        parser.add_argument('-c', '--count', action='store_true', help='only print the number of matching lines of every file')
+        parser.add_argument('--threads', default=str(allocated_threads), help='the number of cpu threads (same values as /t)')
+        parser.add_argument('--engine', choices=SEARCH_ENGINES, default=search_engine, help='the exact match engine')
+        parser.add_argument('--executor', choices=EXECUTOR_MODES, default=executor_mode, help='where the searches run (default: the saved strategy)')
+        parser.add_argument('--recursive', action='store_true', default=recursive_state == 'enabled', help='search inside sub-directories')
+        parser.add_argument('--index', action='store_true', default=index_state == 'enabled', help='use the search indexes')
+        parser.add_argument('--no-cache', action='store_true', help='neither read nor write the search result cache')
+        parser.add_argument('--stats', action='store_true', help='add the per-worker statistics and the slowest files to the JSON summaries')
+        parser.add_argument('--json', action='store_true', help='print one JSON object per result and per query summary (JSONL)')
+
+        args = parser.parse_args(argv)
+        if not args.query and args.queries is None:
+            parser.error('at least one --query or a --queries file is required')
+        if not 0 <= args.score <= 1:
+            parser.error('--score must be between 0 and 1')
+        if args.top < 0:
+            parser.error('--top must be greater than or equal to 0')
+        if args.limit < 0:
+            parser.error('--limit must be greater than or equal to 0')
+        if args.queries not in (None, '-') and not os.path.isfile(args.queries):
+            parser.error(f"{args.queries} is not a file")
+        if not os.path.isdir(args.dir):
+            parser.error(f"{args.dir} is not a directory")
+        try:
+            args.threads = thread_allocator(args.threads, SYSTEM_CPUS)
+        except (TooManyThreadError, ZeroThreadError, ThreadAllocatorArgumentError):
+            parser.error(f"invalid number of threads: {args.threads}")
+        return args
+
+
+    def batch_queries(args):
+        """Yield the queries of the command line, then those of the queries file."""
+        yield from args.query
+        if args.queries is None:
+            return
+        queries_file = sys.stdin if args.queries == '-' else open(args.queries, 'r', encoding='utf8')
+        with queries_file:
+            for query in queries_file:
+                query = query.strip()
+                if query:
+                    yield query
+
+
+    def batch_search(argv):
+        """
+        Run every query of the command line against a single warmed-up pool and a single walk of the directory.
+
+        Return values:
+        * exit_code (int)  --  0 if anything was found, 1 otherwise (like grep)
+        """
+        global json_query, json_stats, top_results, index_state, recursive_state, search_engine, cache_size, executor_mode
+        global result_limit, files_only, count_mode
+        args = parse_batch_args(argv)
+        search_dir = os.path.abspath(args.dir)
+        method = search_method if args.method is None else f"{args.method}_match"
+        top_results = args.top
+        result_limit = args.limit
+        files_only = args.files_with_matches
+        count_mode = args.count
+        index_state = TOGGLE_STATES[args.index]
+        recursive_state = TOGGLE_STATES[args.recursive]
+        search_engine = args.engine
+        executor_mode = args.executor
+        json_stats = args.stats
+        if args.no_cache:
+            cache_size = '0'
+
+        search_files = tuple(walk_files(search_dir, args.recursive, SEARCHED_EXTENSIONS))
+        found = 0
+        for query in batch_queries(args):
+            json_query = query if args.json else None
+            found += searchers_wrapper(search_dir, method, query, args.score, args.threads, search_files)
+        return 0 if found else 1
+
+
+    if len(sys.argv) > 1:
+        try:
+            sys.exit(batch_search(sys.argv[1:]))
+        except BrokenPipeError:
+            # The reader (e.g. head) stopped early, so don't let Python complain about stdout at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        finally:
+            release_pool()
+
     # ----------------- #
     # MAIN PROGRAM LOOP #
     # ----------------- #
@@ -342,14 +3043,52 @@ if __name__ == '__main__':
                 target_dir = cd_command(user_input, target_dir)
                 continue
 
+            if user_input.startswith('/limit'):
+                result_limit, files_only = limit_command(user_input, result_limit, files_only)
+                continue
+
+            if user_input.startswith('/count'):
+                count_mode = count_command(user_input, count_mode)
+                continue
+
+            if user_input.startswith('/ca'):
+                cache_size = ca_command(user_input, cache_size)
+                continue
+
+            # Must be checked before /t
+            if user_input.startswith('/top'):
+                top_results = top_command(user_input, top_results)
+                continue
+
             if user_input.startswith('/t'):
                 allocated_threads = t_command(user_input, SYSTEM_CPUS, allocated_threads)
                 continue
 
+            # Must be checked before /s
+            if user_input.startswith('/stats'):
+                stats_command(user_input)
+                continue
+
             if user_input.startswith('/s'):
                 approx_score = s_command(user_input, approx_score)
                 continue
 
+            if user_input.startswith('/r'):
+                recursive_state = r_command(user_input, recursive_state)
+                continue
+
+            if user_input.startswith('/en'):
+                search_engine = en_command(user_input, search_engine)
+                continue
+
+            if user_input.startswith('/ex'):
+                executor_mode = ex_command(user_input, executor_mode)
+                continue
+
+            if user_input.startswith('/ix'):
+                index_state = ix_command(user_input, index_state)
+                continue
+
             if user_input.startswith('/mt'):
                 output = mt_command(user_input)
                 if output != 'invalid':
@@ -378,3 +3117,5 @@ if __name__ == '__main__':
     except Exception as err:
         write_crashlog(CONFIG_DIR, PROGRAM, err)
         user_input = input("Press <ENTER> to exit ")
+    finally:
+        release_pool()
@@ -8,16 +8,35 @@
 import os
 import sys
 import logging
+import shutil
+import zipfile
+import subprocess
 
 from time import perf_counter
+from functools import partial
 from multiprocessing import Pool
 from multiprocessing import freeze_support
 from multiprocessing import set_start_method
+from xml.etree.ElementTree import iterparse
+from xml.etree.ElementTree import ParseError
+
+try:
+    import resource  # only used to report the peak memory of the workers (not available on Windows)
+except ImportError:
+    resource = None
 
 # foreign modules
 from pypandoc import convert_file
 from pypandoc import download_pandoc
-from pdfminer.high_level import extract_text
+from pypandoc import get_pandoc_path
+from pypandoc import get_pandoc_version
+from pdfminer.layout import LAParams
+from pdfminer.high_level import extract_text_to_fp
+from pdfminer.pdftypes import resolve1
+from pdfminer.pdftypes import PDFException
+from pdfminer.psparser import PSException
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdfdocument import PDFDocument
 
 # ----------------------- #
 # COREUTILS CUSTOM MODULE #
@@ -101,10 +120,57 @@ DEFAULT_UNSUPPORTED_TYPES = (
     ".lisp .go .hs\n",
 )
 
+# The parts of a DOCX file read by the native extractor (the notes are appended after the body)
+DOCX_DOCUMENT = 'word/document.xml'
+DOCX_NOTES = ('word/footnotes.xml', 'word/endnotes.xml')
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+WORD_PARAGRAPH = f"{WORD_NAMESPACE}p"
+WORD_RUN = f"{WORD_NAMESPACE}r"
+WORD_TEXT = f"{WORD_NAMESPACE}t"
+WORD_NOTE_TYPE = f"{WORD_NAMESPACE}type"
+WORD_NOTE_TAGS = (f"{WORD_NAMESPACE}footnote", f"{WORD_NAMESPACE}endnote")
+WORD_CHARACTERS = {
+    f"{WORD_NAMESPACE}tab" : '\t',
+    f"{WORD_NAMESPACE}br" : '\n',
+    f"{WORD_NAMESPACE}cr" : '\n',
+    f"{WORD_NAMESPACE}noBreakHyphen" : '-',
+}
+# Embedded documents (HTML, RTF, ...) can only be converted by pandoc
+WORD_UNSUPPORTED_TAGS = (f"{WORD_NAMESPACE}altChunk",)
+# Text boxes & shapes are stored twice, the fallback copy is for older versions of Word
+COMPATIBILITY_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# The DOCX files that need pandoc are converted in batches of up to PANDOC_BATCH_SIZE files per launch.
+# Batches are read from a Lua script by 'pandoc lua' (pandoc >= 3.0), older versions convert one file per launch
+PANDOC_BATCH_SIZE = 100
+PANDOC_BATCH_VERSION = (3, 0)
+PANDOC_BATCH_SCRIPT = r"""
+for i = 1, #arg, 2 do
+  local converted, err = pcall(function()
+    local source = assert(io.open(arg[i], 'rb'))
+    local document = pandoc.read(source:read('a'), 'docx')
+    source:close()
+    local target = assert(io.open(arg[i + 1], 'wb'))
+    target:write(pandoc.write(document, 'plain'))
+    target:close()
+  end)
+  io.write(converted and 'ok' or ('fail\t' .. tostring(err):gsub('\n', ' ')), '\n')
+  io.flush()
+end
+"""
+
+# PDFs with more than PDF_SPLIT_PAGES pages are extracted by several workers at once, PDF_RANGE_PAGES pages per worker
+PDF_SPLIT_PAGES = 100
+PDF_RANGE_PAGES = 50
+
 # ------------------------- #
 # TEXTER-SPECIFIC FUNCTIONS #
 # ------------------------- #
 
+class DocxFormatError(Exception):
+    """Raised when a DOCX file contains something that only pandoc can convert."""
+
 def fetch_types(raw_types):
     """Parse file types and return a tuple."""
     processed_types = []
@@ -124,16 +190,29 @@ def file_converter(args):
     1. file_name         --  the name of the file to be converted
     2. convert_dir       --  the full path to the convert directory (e.g. target_dir)
     3. unsupported_types --  the list of additional file types to be converted
+    4. split_pages       --  PDFs with more pages are split into page ranges (optional, 0 never splits them)
 
     Keywords must be added together into a single whole string in the exact order as above. 
     Each keyword must be separated by a unique string of characters:
     * example: file1.docx<@#@>/home/DBVG/Documents
+
+    The DOCX files that only pandoc can convert are deferred instead (status: 'defer'),
+    so that they can be converted together afterwards (see pandoc_converter).
+    So are the PDFs with more than split_pages pages (status: 'split'), whose page ranges
+    are then extracted by several workers at once (see pdf_range_converter).
+
+    Return values:
+    * converter_output (str)  --  the converter message ('' for deferred files)
+    * converter_status (str)  --  'success', 'fail', 'unsure', 'skip', 'defer' or 'split'
+    * deferred_task (str)     --  the original & new path of a deferred file (followed by the page count
+                                  of a split PDF), separated by SEPARATOR ('' otherwise)
     """
 
     args = args.split(SEPARATOR)
     file_name = args[0]
     convert_dir = args[1]
     unsupported_types = args[2]
+    split_pages = int(args[3]) if len(args) > 3 else 0
 
     old_path = os.path.join(convert_dir, file_name)
     old_head = os.path.splitext(old_path)[0]
@@ -151,6 +230,9 @@ def file_converter(args):
     if file_ext == '.docx':
         converter_status, converter_output = docx_handler(old_path, new_path)
     elif file_ext == '.pdf':
+        page_count = pdf_page_count(old_path) if split_pages else 0
+        if page_count > split_pages:
+            return '', 'split', f"{old_path}{SEPARATOR}{new_path}{SEPARATOR}{page_count}"
         converter_status, converter_output = pdf_handler(old_path, new_path)
     elif file_ext in unsupported_types and os.path.isfile(old_path):
         # the isfile check prevents Windows from opening a folder as a file
@@ -159,18 +241,149 @@ def file_converter(args):
         converter_status = 'skip'
         converter_output = f"{Tips.SKIPPED} Skipped {file_name}"
 
+    if converter_status == 'defer':
+        return '', converter_status, f"{old_path}{SEPARATOR}{new_path}"
+    return conversion_report(old_path, converter_status, converter_output), converter_status, ''
+
+def conversion_report(original_path, converter_status, converter_output):
+    """Delete the original file of a successful conversion and return the complete converter message."""
+    file_name = os.path.basename(original_path)
     if converter_status in ('success', 'unsure'):
-        os.remove(old_path)
+        os.remove(original_path)
         if converter_status == 'success' and not converter_output:
             converter_output = f"{Tips.SUCCESS} Successfully converted {file_name}"
     elif converter_status == 'fail':
         converter_output += f"{Tips.FAIL2} Failed to convert {file_name}"
         # The cause of failure must always be printed out first
+    return converter_output
+
+def pandoc_converter(args):
+    """
+    Convert a batch of deferred DOCX files (see file_converter) with as few pandoc launches as possible.
+
+    Keyword arguments:
+    1. pandoc_path  --  the pandoc executable ('' if pandoc couldn't be found, see find_pandoc)
+    2. batch_mode   --  'lua' converts the whole batch with a single launch, 'file' launches pandoc once per file
+    3. ...          --  the original & new path of every file of the batch, one after another
+
+    Return values:
+    * reports (list)       --  the (converter_output, converter_status) of every file
+    * launches (int)       --  the number of pandoc launches
+    * launch_time (float)  --  the total time of those launches
+    """
+    args = args.split(SEPARATOR)
+    pandoc_path = args[0]
+    batch_mode = args[1]
+    pandoc_tasks = tuple(zip(args[2::2], args[3::2]))
+
+    if not pandoc_path:
+        handler_output = f"{Tips.FAIL1} Pandoc couldn't be found. Please install pandoc\n"
+        reports = [(conversion_report(old_path, 'fail', handler_output), 'fail') for old_path, _ in pandoc_tasks]
+        return reports, 0, 0.0
+
+    start_time = perf_counter()
+    if batch_mode == 'lua':
+        handler_results = pandoc_batch_handler(pandoc_path, pandoc_tasks)
+        launches = 1
+    else:
+        handler_results = [pandoc_handler(old_path, new_path) for old_path, new_path in pandoc_tasks]
+        launches = len(pandoc_tasks)
+    launch_time = perf_counter() - start_time
 
-    return converter_output, converter_status
+    reports = []
+    for (old_path, _), (handler_status, handler_output) in zip(pandoc_tasks, handler_results):
+        reports.append((conversion_report(old_path, handler_status, handler_output), handler_status))
+    return reports, launches, launch_time
+
+def find_pandoc():
+    """
+    Look for pandoc once, before any file is handed to it (see pandoc_converter).
+
+    Return values:
+    * pandoc_path (str)  --  the pandoc executable ('' if pandoc couldn't be found)
+    * batch_mode (str)   --  'lua' if this version of pandoc can convert whole batches, 'file' otherwise
+    """
+    try:
+        pandoc_path = get_pandoc_path()
+        version = tuple(int(number) for number in get_pandoc_version().split('.')[:2])
+    except (OSError, ValueError):
+        return '', 'file'
+    return pandoc_path, 'lua' if version >= PANDOC_BATCH_VERSION else 'file'
+
+def docx_paragraphs(docx_file, part_name):
+    """
+    Stream the text of every non-empty paragraph of a part of a DOCX file (e.g. word/document.xml).
+
+    The XML is parsed incrementally and every element is dropped from its parent as soon as
+    it has been read, so only the paragraph being read is ever kept in memory.
+    The paragraphs nested inside another one (text boxes) are yielded before it.
+
+    Keyword arguments:
+    * docx_file (ZipFile)  --  the opened DOCX file
+    * part_name (str)      --  the name of the XML part inside the DOCX file
+    """
+    ancestors = []
+    paragraphs = []  # the pieces of text of the paragraphs being read
+    skipped = 0      # > 0 while inside an element whose text must be ignored
+    with docx_file.open(part_name) as part:
+        for event, element in iterparse(part, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if not ancestors and not tag.startswith(WORD_NAMESPACE):
+                    # e.g. the 'Strict Open XML' flavour of DOCX, which uses other namespaces
+                    raise DocxFormatError(tag)
+                ancestors.append(element)
+                if skipped or tag == COMPATIBILITY_FALLBACK or (tag in WORD_NOTE_TAGS and WORD_NOTE_TYPE in element.attrib):
+                    # Separator "notes" have a type, real footnotes & endnotes don't
+                    skipped += 1
+                elif tag == WORD_PARAGRAPH:
+                    paragraphs.append([])
+                elif tag in WORD_UNSUPPORTED_TAGS:
+                    raise DocxFormatError(tag)
+                continue
+
+            ancestors.pop()
+            if skipped:
+                skipped -= 1
+            elif tag == WORD_TEXT and paragraphs:
+                paragraphs[-1].append(element.text or '')
+            elif tag in WORD_CHARACTERS and paragraphs and ancestors[-1].tag == WORD_RUN:
+                # Only inside a run, e.g. w:tab also defines the tab stops of a paragraph (w:pPr/w:tabs)
+                paragraphs[-1].append(WORD_CHARACTERS[tag])
+            elif tag == WORD_PARAGRAPH:
+                paragraph = ''.join(paragraphs.pop()).strip()
+                if paragraph:
+                    yield paragraph
+            if ancestors:
+                ancestors[-1].remove(element)
+
+
+def docx_extractor(original_path, new_path):
+    """
+    Extract the text of a DOCX file without starting pandoc, one paragraph per line.
+    Return False (and leave no output behind) if the file must be converted by pandoc instead.
+    """
+    try:
+        with zipfile.ZipFile(original_path) as docx_file, open(new_path, 'w', encoding='utf8') as new_file:
+            for part_name in (DOCX_DOCUMENT,) + DOCX_NOTES:
+                if part_name != DOCX_DOCUMENT and part_name not in docx_file.NameToInfo:
+                    continue
+                for paragraph in docx_paragraphs(docx_file, part_name):
+                    new_file.write(f"{paragraph}\n")
+        return True
+    except (zipfile.BadZipFile, KeyError, ParseError, DocxFormatError):
+        if os.path.exists(new_path):
+            os.remove(new_path)
+        return False
 
 def docx_handler(original_path, new_path):
-    """Convert DOCX into TXT and return the conversion status & converter message."""
+    """Convert DOCX into TXT and return the conversion status & converter message ('defer' if pandoc is needed)."""
+    if docx_extractor(original_path, new_path):
+        return 'success', ''
+    return 'defer', ''
+
+def pandoc_handler(original_path, new_path):
+    """Convert DOCX into TXT with a pandoc launch of its own and return the conversion status & converter message."""
     try:
         convert_file(original_path, 'plain', outputfile=new_path)
         handler_status = 'success'
@@ -183,16 +396,113 @@ def docx_handler(original_path, new_path):
         handler_output = f"{Tips.FAIL1} Pandoc couldn't be found. Please install pandoc\n"
     return handler_status, handler_output
 
+def pandoc_batch_handler(pandoc_path, pandoc_tasks):
+    """
+    Convert several DOCX files into TXT with a single pandoc launch (see PANDOC_BATCH_SCRIPT).
+    Return the conversion status & converter message of every file, in the same order.
+    """
+    handler_output = f"{Tips.FAIL1} Experienced a pandoc runtime error\n"
+    try:
+        paths = [path for pandoc_task in pandoc_tasks for path in pandoc_task]
+        completed = subprocess.run(
+            [pandoc_path, 'lua', '-', *paths], input=PANDOC_BATCH_SCRIPT,
+            capture_output=True, text=True, encoding='utf8', errors='replace'
+        )
+        file_statuses = completed.stdout.splitlines()
+    except OSError:
+        handler_output = f"{Tips.FAIL1} Pandoc couldn't be found. Please install pandoc\n"
+        file_statuses = []
+
+    handler_results = []
+    for index in range(len(pandoc_tasks)):
+        # The files after a crash of pandoc have no status at all
+        if index < len(file_statuses) and file_statuses[index] == 'ok':
+            handler_results.append(('success', ''))
+        else:
+            handler_results.append(('fail', handler_output))
+    return handler_results
+
 def pdf_handler(original_path, new_path):
     """Convert PDF into TXT and return the conversion status & converter message."""
-    with open(original_path, 'rb'):
-        extracted_contents = extract_text(original_path)
-    with open(new_path, 'w', encoding='utf8') as new_file:
-        new_file.write(extracted_contents)
+    with open(original_path, 'rb') as pdf_file, open(new_path, 'w', encoding='utf8') as new_file:
+        stream_pdf_text(pdf_file, new_file)
     handler_status = 'success'
     handler_output = ''
     return handler_status, handler_output
 
+def stream_pdf_text(pdf_file, text_file, page_numbers=None, maxpages=0):
+    """
+    Write the text of a PDF into text_file page by page, with the same layout analysis as extract_text().
+
+    pdfminer's object cache is disabled: it keeps every object that was ever read (e.g. the images
+    of scanned documents) until the end, whereas only the page being extracted is kept in memory without it.
+    """
+    extract_text_to_fp(pdf_file, text_file, laparams=LAParams(), page_numbers=page_numbers, maxpages=maxpages, disable_caching=True)
+
+def pdf_page_count(original_path):
+    """Return the number of pages of a PDF without parsing any of them (0 if the page tree can't be read)."""
+    try:
+        with open(original_path, 'rb') as pdf_file:
+            document = PDFDocument(PDFParser(pdf_file))
+            return int(resolve1(resolve1(document.catalog['Pages'])['Count']))
+    except (PDFException, KeyError, TypeError, ValueError):
+        return 0
+
+def pdf_range_converter(args):
+    """
+    Extract the text of a range of pages of a PDF into a part file of its own (see pdf_join_parts).
+
+    Keyword arguments:
+    1. original_path  --  the full path to the PDF
+    2. part_path      --  the full path to the part file
+    3. first_page     --  the first page of the range (starting from 0)
+    4. last_page      --  the page right after the range
+
+    Return values:
+    * original_path (str)     --  the full path to the PDF
+    * converter_status (str)  --  'success' or 'fail'
+    * converter_output (str)  --  the cause of failure ('' if the range was extracted)
+    """
+    args = args.split(SEPARATOR)
+    original_path = args[0]
+    part_path = args[1]
+    first_page = int(args[2])
+    last_page = int(args[3])
+
+    try:
+        with open(original_path, 'rb') as pdf_file, open(part_path, 'w', encoding='utf8') as part_file:
+            # maxpages stops pdfminer right after the range instead of walking the remaining pages
+            stream_pdf_text(pdf_file, part_file, range(first_page, last_page), last_page)
+    except (PSException, OSError, KeyError, TypeError, ValueError):
+        return original_path, 'fail', f"{Tips.FAIL1} Couldn't extract the text of pages {first_page + 1} to {last_page}\n"
+    return original_path, 'success', ''
+
+def peak_memory():
+    """Return the peak resident memory of the current process in bytes (0 if it can't be measured)."""
+    if resource is None:
+        return 0
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS counts in bytes, the other systems in kilobytes
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+def measured_task(function, args):
+    """Run a conversion task and return its result, followed by the pid & peak memory of the worker."""
+    return function(args), os.getpid(), peak_memory()
+
+def pdf_join_parts(new_path, part_paths):
+    """Concatenate the part files of a split PDF in page order into the converted file, then delete them."""
+    with open(new_path, 'wb') as new_file:
+        for part_path in part_paths:
+            with open(part_path, 'rb') as part_file:
+                shutil.copyfileobj(part_file, new_file)
+    pdf_remove_parts(part_paths)
+
+def pdf_remove_parts(part_paths):
+    """Delete the part files of a split PDF (see pdf_range_converter), even if some of them were never written."""
+    for part_path in part_paths:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
 def unsupported_handler(original_path, new_path, file_extension, file_name):
     """Convert UNSUPPORTED into TXT and return the conversion status & converter message."""
     with open(original_path, 'r', encoding='utf8', errors='replace') as old_file:
@@ -316,23 +626,121 @@ if __name__ == '__main__':
     # CONVERTER WRAPPER FUNCTIONS #
     # --------------------------- #
 
-    def prepare_converter_args(operation_dir):
+    def prepare_converter_args(operation_dir, workers):
         """Pack all arguments into a single string before calling file_converter()."""
         converter_args = []
+        # Splitting a PDF is pointless on a single cpu thread
+        split_pages = PDF_SPLIT_PAGES if workers > 1 else 0
         for file in os.listdir(operation_dir):
-            converter_args.append(f"{file}{SEPARATOR}{operation_dir}{SEPARATOR}{UNSUPPORTED_TYPES}")
+            converter_args.append(f"{file}{SEPARATOR}{operation_dir}{SEPARATOR}{UNSUPPORTED_TYPES}{SEPARATOR}{split_pages}")
         return tuple(converter_args)
 
 
+    def pandoc_batches(pandoc_tasks, workers):
+        """
+        Spread the deferred files (see file_converter) evenly across the workers,
+        in batches of up to PANDOC_BATCH_SIZE files, and pack the arguments of pandoc_converter().
+        """
+        pandoc_path, batch_mode = find_pandoc()
+        batches = []
+        for worker in range(workers):
+            worker_tasks = pandoc_tasks[worker::workers]
+            for i in range(0, len(worker_tasks), PANDOC_BATCH_SIZE):
+                batch = SEPARATOR.join(worker_tasks[i:i + PANDOC_BATCH_SIZE])
+                batches.append(f"{pandoc_path}{SEPARATOR}{batch_mode}{SEPARATOR}{batch}")
+        return batches
+
+
+    def pdf_range_tasks(split_tasks, split_pdfs):
+        """
+        Cut every split PDF (see file_converter) into ranges of PDF_RANGE_PAGES pages
+        and pack the arguments of pdf_range_converter().
+        The part files of every PDF are recorded in split_pdfs, as {original_path : [new_path, part_paths, remaining parts, failure]}
+        (failure: the cause of the first failed range, '' if there is none yet).
+        """
+        range_tasks = []
+        for split_task in split_tasks:
+            old_path, new_path, page_count = split_task.split(SEPARATOR)
+            part_paths = []
+            for first_page in range(0, int(page_count), PDF_RANGE_PAGES):
+                last_page = min(first_page + PDF_RANGE_PAGES, int(page_count))
+                part_path = f"{new_path}.part{len(part_paths)}"
+                part_paths.append(part_path)
+                range_tasks.append(f"{old_path}{SEPARATOR}{part_path}{SEPARATOR}{first_page}{SEPARATOR}{last_page}")
+            split_pdfs[old_path] = [new_path, part_paths, len(part_paths), '']
+        return range_tasks
+
+
     def converter_pool(workers, args):
-        """Multithreading support for file_converter()."""
+        """
+        Multithreading support for file_converter().
+
+        The files that only pandoc can convert are converted last, in batches (see pandoc_converter),
+        so that pandoc is only launched a few times instead of once per file.
+        Large PDFs are extracted page range by page range (see pdf_range_tasks), and every PDF
+        is put back together in page order as soon as its last range is done. If any of its
+        ranges failed, its part files are deleted instead and the original PDF is kept.
+
+        Return values:
+        * report_statuses (dict)  --  {status : number of files}
+        * pandoc_launches (int)   --  the number of pandoc launches
+        * pandoc_time (float)     --  the total time of those launches
+        * worker_peaks (dict)     --  {pid : peak memory of the worker in bytes} (see peak_memory)
+        """
         report_statuses = {'success' : 0, 'fail' : 0, 'unsure' : 0, 'skip' : 0}
+        pandoc_tasks = []
+        split_tasks = []
+        pandoc_launches = 0
+        pandoc_time = 0.0
+        worker_peaks = {}
+
+        def measured_results(pool, function, args):
+            for result, pid, peak in pool.imap_unordered(partial(measured_task, function), args):
+                # The peak memory of a process never goes down, so the latest one is the peak of the worker
+                if peak:
+                    worker_peaks[pid] = peak
+                yield result
+
         with Pool(workers) as pool:
-            for output, status in pool.imap_unordered(file_converter, args):
+            for output, status, deferred_task in measured_results(pool, file_converter, args):
+                if status == 'defer':
+                    pandoc_tasks.append(deferred_task)
+                    continue
+                if status == 'split':
+                    split_tasks.append(deferred_task)
+                    continue
                 print(output)
                 if status in report_statuses:
                     report_statuses[status] += 1
-        return report_statuses
+
+            if split_tasks:
+                split_pdfs = {}
+                range_tasks = pdf_range_tasks(split_tasks, split_pdfs)
+                for old_path, status, output in measured_results(pool, pdf_range_converter, range_tasks):
+                    split_pdf = split_pdfs[old_path]
+                    split_pdf[2] -= 1
+                    if status == 'fail' and not split_pdf[3]:
+                        split_pdf[3] = output
+                    if split_pdf[2] == 0:
+                        new_path, part_paths, _, failure = split_pdfs.pop(old_path)
+                        if failure:
+                            pdf_remove_parts(part_paths)
+                            print(conversion_report(old_path, 'fail', failure))
+                            report_statuses['fail'] += 1
+                            continue
+                        pdf_join_parts(new_path, part_paths)
+                        print(conversion_report(old_path, 'success', ''))
+                        report_statuses['success'] += 1
+
+            if pandoc_tasks:
+                batches = pandoc_batches(pandoc_tasks, workers)
+                for reports, launches, launch_time in measured_results(pool, pandoc_converter, batches):
+                    pandoc_launches += launches
+                    pandoc_time += launch_time
+                    for output, status in reports:
+                        print(output)
+                        report_statuses[status] += 1
+        return report_statuses, pandoc_launches, pandoc_time, worker_peaks
 
 
     def converter_wrapper(convert_dir, threads, verbose_output=''):
@@ -343,8 +751,8 @@ if __name__ == '__main__':
         logging.disable()  # disable pypandoc error logs
         start_time = perf_counter()
 
-        converter_args = prepare_converter_args(convert_dir)
-        statuses = converter_pool(threads, converter_args)
+        converter_args = prepare_converter_args(convert_dir, threads)
+        statuses, pandoc_launches, pandoc_time, worker_peaks = converter_pool(threads, converter_args)
 
         end_time = perf_counter()
         logging.disable(logging.NOTSET)
@@ -372,6 +780,14 @@ if __name__ == '__main__':
             if skip_count > 0:
                 print(f"{Tips.SKIPPED} Skipped file(s): {Colors.BLUE}{skip_count}{Colors.RESET}")
 
+        if pandoc_launches > 0:
+            print(f"{Tips.FINISH} Launched pandoc {Colors.CYAN}{pandoc_launches}{Colors.RESET} time(s) "
+                  f"({Colors.CYAN}{pandoc_time / pandoc_launches:.5f}{Colors.RESET} seconds per launch)")
+
+        if worker_peaks:
+            peaks = ', '.join(f"{Colors.CYAN}{peak / 1024 / 1024:.1f}{Colors.RESET} MB" for peak in sorted(worker_peaks.values(), reverse=True))
+            print(f"{Tips.FINISH} Peak memory of the worker(s): {peaks}")
+
         operation_time = end_time - start_time
         print(f"{Tips.FINISH} Finished in {Colors.CYAN}{operation_time:.5f}{Colors.RESET} seconds "
               f"with ({threads}) cpu threads")
@@ -0,0 +1,308 @@
+# ------------------------------------- #
+# DBVG SearTxT Benchmark                #
+# Reproducible searcher measurements.   #
+# Written and tested with Python 3.10.8 #
+# ------------------------------------- #
+
+# native modules
+import os
+import sys
+import json
+import random
+import shutil
+import platform
+import tempfile
+
+from time import perf_counter
+from statistics import median
+from functools import partial
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+from multiprocessing import Pool
+from multiprocessing import freeze_support
+from multiprocessing import set_start_method
+
+# SearTxT modules (their interactive sessions only start when run directly)
+from coreutils import SEPARATOR
+from coreutils import bounded_imap
+
+from SearTxT import TASKS_PER_WORKER
+from SearTxT import pool_ready
+from SearTxT import exact_search
+from SearTxT import mmap_search
+from SearTxT import regex_search
+from SearTxT import multi_search
+from SearTxT import approximate_search
+
+# ---------------- #
+# GLOBAL CONSTANTS #
+# ---------------- #
+
+VERSION = 1.0
+PROGRAM = 'SearTxT Benchmark'
+
+SEARCHERS = {
+    'exact' : exact_search,
+    'mmap' : mmap_search,
+    'regex' : regex_search,
+    'multi' : multi_search,
+    'approx' : approximate_search,
+}
+STRATEGIES = ('inline', 'threads', 'processes')
+
+# The filler words of the synthetic corpora (a few non-ASCII ones keep the decoders honest)
+FILLER_WORDS = (
+    'lorem', 'ipsum', 'dolor', 'sit', 'amet', 'alpha', 'beta', 'gamma', 'delta', 'searching',
+    'document', 'archive', 'record', 'index', 'naïve', 'café', 'straße', 'текст', 'données', 'world',
+)
+NEEDLE = 'quartzite'
+APPROXIMATE_NEEDLE = 'quartsite'  # one substitution away, so a 0.85 cutoff still finds it
+
+# ---------------------- #
+# SYNTHETIC CORPUS STUFF #
+# ---------------------- #
+
+def generate_line(rng, line_length, needle=None):
+    """Return a line of roughly line_length characters, with the needle at a random position."""
+    words = []
+    length = 0
+    while length < line_length:
+        word = rng.choice(FILLER_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    if needle is not None:
+        words[rng.randrange(len(words))] = needle
+    return ' '.join(words)
+
+
+def generate_corpus(corpus_dir, files, file_size, line_length, hit_density, seed=0):
+    """
+    Write a reproducible synthetic corpus of .txt files.
+
+    Keyword arguments:
+    * corpus_dir (str)     --  the folder to write the files into
+    * files (int)          --  the number of files
+    * file_size (int)      --  the approximate size of every file (in bytes)
+    * line_length (int)    --  the approximate length of every line (in characters)
+    * hit_density (float)  --  the fraction of lines containing the needle
+    * seed (int)           --  the seed of the random generator (same seed, same corpus)
+
+    Return values:
+    * corpus (dict)  --  {'files', 'bytes', 'lines', 'hit_lines'}
+    """
+    rng = random.Random(seed)
+    total_bytes = 0
+    total_lines = 0
+    hit_lines = 0
+    for file_number in range(files):
+        lines = []
+        size = 0
+        while size < file_size:
+            needle = NEEDLE if rng.random() < hit_density else None
+            line = generate_line(rng, line_length, needle)
+            hit_lines += needle is not None
+            lines.append(line)
+            size += len(line.encode('utf8')) + 1
+        with open(os.path.join(corpus_dir, f"file{file_number:06d}.txt"), 'w', encoding='utf8', newline='\n') as corpus_file:
+            corpus_file.write('\n'.join(lines) + '\n')
+        total_bytes += size
+        total_lines += len(lines)
+    return {'files' : files, 'bytes' : total_bytes, 'lines' : total_lines, 'hit_lines' : hit_lines}
+
+def describe_corpus(corpus_dir):
+    """Return the same statistics as generate_corpus() for an existing corpus (hit_lines is unknown)."""
+    corpus = {'files' : 0, 'bytes' : 0, 'lines' : 0, 'hit_lines' : None}
+    for file_name in os.listdir(corpus_dir):
+        file_path = os.path.join(corpus_dir, file_name)
+        if not file_name.endswith('.txt') or not os.path.isfile(file_path):
+            continue
+        with open(file_path, 'rb') as corpus_file:
+            content = corpus_file.read()
+        corpus['files'] += 1
+        corpus['bytes'] += len(content)
+        corpus['lines'] += content.count(b'\n')
+    return corpus
+
+# -------------------------- #
+# EXECUTION STRATEGIES STUFF #
+# -------------------------- #
+
+def search_arguments(corpus_dir, searcher, score):
+    """Build the argument string of every file, exactly like SearTxT does (see search_tasks)."""
+    query = {'approx' : APPROXIMATE_NEEDLE, 'regex' : f"{NEEDLE[:4]}\\w+te", 'multi' : f"{NEEDLE}\nzzzunused"}.get(searcher, NEEDLE)
+    arguments = []
+    for file_name in sorted(os.listdir(corpus_dir)):
+        if not file_name.endswith('.txt'):
+            continue
+        argument = f"{file_name}{SEPARATOR}{query}{SEPARATOR}{corpus_dir}"
+        if searcher == 'approx':
+            argument = f"{argument}{SEPARATOR}{score}{SEPARATOR}0"
+        arguments.append(argument)
+    return arguments
+
+
+def run_inline(function, arguments, _):
+    return [function(argument) for argument in arguments]
+
+
+def run_threads(function, arguments, executor):
+    return list(executor.map(function, arguments))
+
+
+def run_processes(function, arguments, pool, window):
+    return list(bounded_imap(pool, function, arguments, window))
+
+
+def start_executor(strategy, threads):
+    """
+    Start the (persistent) executor of a strategy, like SearTxT's session-wide worker pool.
+
+    Return values:
+    * executor         --  None, a ThreadPoolExecutor or a warmed-up Pool
+    * runner           --  runner(function, arguments, executor) searches every file once
+    * startup (float)  --  the time spent starting the executor
+    """
+    start_time = perf_counter()
+    if strategy == 'inline':
+        executor, runner = None, run_inline
+    elif strategy == 'threads':
+        executor, runner = ThreadPoolExecutor(threads), run_threads
+    else:
+        executor, runner = Pool(threads), partial(run_processes, window=threads * TASKS_PER_WORKER)
+        executor.map(pool_ready, range(threads), chunksize=1)
+    return executor, runner, perf_counter() - start_time
+
+
+def stop_executor(executor):
+    if isinstance(executor, ThreadPoolExecutor):
+        executor.shutdown()
+    elif executor is not None:
+        executor.terminate()
+        executor.join()
+
+
+def percentile(samples, fraction):
+    """Return a percentile of the samples, interpolated between the two closest ranks."""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def benchmark(corpus_dir, corpus, searcher, strategy, threads, repeat, warmup, score):
+    """Measure a single (searcher, strategy, threads) combination and return its report."""
+    function = SEARCHERS[searcher]
+    arguments = search_arguments(corpus_dir, searcher, score)
+    executor, runner, startup = start_executor(strategy, threads)
+    try:
+        for _ in range(warmup):
+            runner(function, arguments, executor)
+
+        latencies = []
+        hits = None
+        for _ in range(repeat):
+            start_time = perf_counter()
+            results = runner(function, arguments, executor)
+            latencies.append(perf_counter() - start_time)
+            hits = sum(len(file_hits) for _, _, _, file_hits in results)
+    finally:
+        stop_executor(executor)
+
+    typical = median(latencies)
+    return {
+        'searcher' : searcher,
+        'strategy' : strategy,
+        'threads' : threads,
+        'hits' : hits,
+        'startup_s' : startup,
+        'p50_s' : percentile(latencies, 0.5),
+        'p95_s' : percentile(latencies, 0.95),
+        'mb_per_s' : corpus['bytes'] / 1024 / 1024 / typical,
+        'files_per_s' : corpus['files'] / typical,
+    }
+
+# ---------------------------- #
+# COMMAND LINE INTERFACE STUFF #
+# ---------------------------- #
+
+def parse_list(value, item_type=str):
+    return tuple(item_type(item.strip()) for item in value.split(',') if item.strip())
+
+
+def parse_args(argv):
+    parser = ArgumentParser(description=f"{PROGRAM} ver {VERSION}: measure the SearTxT searchers on a synthetic corpus")
+    parser.add_argument('--files', type=int, default=200, help='the number of files (default: 200)')
+    parser.add_argument('--file-size', type=int, default=64, help='the size of every file in KB (default: 64)')
+    parser.add_argument('--line-length', type=int, default=80, help='the length of every line (default: 80)')
+    parser.add_argument('--hit-density', type=float, default=0.01, help='the fraction of lines with a hit (default: 0.01)')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the synthetic corpus (default: 0)')
+    parser.add_argument('--corpus-dir', help='keep the generated corpus in this folder (an existing, non-empty folder is searched as is)')
+    parser.add_argument('--searchers', type=parse_list, default=('exact', 'mmap', 'approx'), help='comma-separated searchers (default: exact,mmap,approx)')
+    parser.add_argument('--strategies', type=parse_list, default=STRATEGIES, help='comma-separated strategies (default: inline,threads,processes)')
+    parser.add_argument('--threads', type=lambda value: parse_list(value, int), default=None, help='comma-separated thread counts (default: 1 and all cpus)')
+    parser.add_argument('--repeat', type=int, default=5, help='the measured runs of every combination (default: 5)')
+    parser.add_argument('--warmup', type=int, default=1, help='the unmeasured runs of every combination (default: 1)')
+    parser.add_argument('--score', type=float, default=0.85, help='the approximate searcher cutoff (default: 0.85)')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+
+    args = parser.parse_args(argv)
+    for searcher in args.searchers:
+        if searcher not in SEARCHERS:
+            parser.error(f"unknown searcher: {searcher}")
+    for strategy in args.strategies:
+        if strategy not in STRATEGIES:
+            parser.error(f"unknown strategy: {strategy}")
+    if args.threads is None:
+        args.threads = tuple(sorted({1, os.cpu_count() or 1}))
+    if args.repeat < 1 or min(args.threads) < 1:
+        parser.error('--repeat and --threads must be greater than 0')
+    return args
+
+
+def main(argv):
+    args = parse_args(argv)
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix='seartxt-bench-')
+    try:
+        os.makedirs(corpus_dir, exist_ok=True)
+        if os.listdir(corpus_dir):
+            # Never overwrite an existing folder, measure whatever it contains instead
+            corpus = describe_corpus(corpus_dir)
+        else:
+            corpus = generate_corpus(corpus_dir, args.files, args.file_size * 1024, args.line_length, args.hit_density, args.seed)
+            corpus.update(seed=args.seed, line_length=args.line_length, hit_density=args.hit_density)
+
+        results = []
+        for searcher in args.searchers:
+            for strategy in args.strategies:
+                # Inline searches always run on a single thread
+                for threads in ((1,) if strategy == 'inline' else args.threads):
+                    report = benchmark(corpus_dir, corpus, searcher, strategy, threads, args.repeat, args.warmup, args.score)
+                    results.append(report)
+                    print(f"{searcher:>7} {strategy:>9} x{threads:<3} p50 {report['p50_s']:.5f}s  {report['mb_per_s']:.1f} MB/s", file=sys.stderr)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    report = {
+        'version' : VERSION,
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'cpus' : os.cpu_count(),
+        'corpus' : corpus,
+        'repeat' : args.repeat,
+        'results' : results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    freeze_support()
+    set_start_method('spawn')  # same start method as SearTxT
+    sys.exit(main(sys.argv[1:]))
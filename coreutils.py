@@ -6,6 +6,9 @@
 
 import os
 from math import ceil
+from queue import SimpleQueue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from random import randint
 from datetime import datetime
 from traceback import format_exc
@@ -128,6 +131,10 @@ def refresh_display(program, version, script_dir, notification='', method=''):
 
     if method == 'exact_match':
         print(f"Search method: {Colors.CYAN}exact match{Colors.RESET}")
+    elif method == 'multi_match':
+        print(f"Search method: {Colors.CYAN}multi-pattern exact match{Colors.RESET}")
+    elif method == 'regex_match':
+        print(f"Search method: {Colors.CYAN}regular expression{Colors.RESET}")
     elif method:
         print(f"Search method: {Colors.CYAN}approximate match{Colors.RESET}")
 
@@ -241,6 +248,122 @@ def thread_allocator(user_threads, total_cpu):
             user_threads = total_cpu
     return int(user_threads)
 
+def bounded_imap(pool, function, arguments, window):
+    """
+    A lazier pool.imap_unordered() with bounded backpressure.
+
+    Unlike imap_unordered(), which drains the whole iterable into the task queue,
+    at most 'window' tasks are in flight at once, so arguments can be generated
+    while the results are already being consumed.
+
+    Keyword arguments:
+    * pool (Pool)          --  the worker pool (anything with apply_async())
+    * function (callable)  --  the function to be called with each argument
+                               (None: each argument is a (function, argument) pair)
+    * arguments (iter)     --  the (possibly lazy) iterable of arguments
+    * window (int)         --  the maximum number of in-flight tasks
+
+    Return values:
+    * a generator of the function results, in completion order
+    * any exception raised by a task is re-raised when its result is reached
+    """
+    completed = SimpleQueue()
+    pending = 0
+
+    def next_result():
+        succeeded, value = completed.get()
+        if not succeeded:
+            raise value
+        return value
+
+    for argument in arguments:
+        task_function = function
+        if function is None:
+            task_function, argument = argument
+        pool.apply_async(
+            task_function, (argument,),
+            callback=lambda value: completed.put((True, value)),
+            error_callback=lambda error: completed.put((False, error)),
+        )
+        pending += 1
+        while pending >= window or (pending and not completed.empty()):
+            pending -= 1
+            yield next_result()
+
+    while pending:
+        pending -= 1
+        yield next_result()
+
+
+class InlinePool:
+    """
+    A stand-in for Pool that runs every task in the calling process as soon as it is submitted.
+    Small searches are over long before a real pool would have started (see bounded_imap).
+    """
+    def apply_async(self, function, args=(), callback=None, error_callback=None):
+        try:
+            value = function(*args)
+        except Exception as error:
+            if error_callback is not None:
+                error_callback(error)
+            return
+        if callback is not None:
+            callback(value)
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
+def read_ahead(items, prefetch, lookahead, threads=4):
+    """
+    Pass the items through unchanged, but hand each of them to prefetch() on a small
+    thread pool 'lookahead' items before it is yielded, so that slow I/O (see advise_willneed)
+    overlaps with whatever the consumer does with the previous items.
+
+    Keyword arguments:
+    * items (iter)         --  the (possibly lazy) iterable of items
+    * prefetch (callable)  --  the function called with each item, its result is ignored
+    * lookahead (int)      --  the number of items prefetched in advance
+    * threads (int)        --  the number of I/O threads
+    """
+    executor = ThreadPoolExecutor(threads)
+    buffer = deque()
+    try:
+        for item in items:
+            executor.submit(prefetch, item)
+            buffer.append(item)
+            if len(buffer) > lookahead:
+                yield buffer.popleft()
+        while buffer:
+            yield buffer.popleft()
+    finally:
+        # Don't block on prefetches that are no longer needed
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def advise_willneed(file_path, start=0, length=0, block_size=1048576):
+    """
+    Ask the OS to start reading a file (or length bytes of it from start, 0 for all of it) into the page cache.
+    Systems without posix_fadvise() get the cache warmed up by reading the bytes instead.
+    """
+    try:
+        with open(file_path, 'rb', buffering=0) as prefetched_file:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(prefetched_file.fileno(), start, length, os.POSIX_FADV_WILLNEED)
+                return
+            prefetched_file.seek(start)
+            remaining = length or float('inf')
+            while remaining > 0:
+                block = prefetched_file.read(int(min(block_size, remaining)))
+                if not block:
+                    break
+                remaining -= len(block)
+    except OSError:
+        pass  # the search task will run into the same error anyway
+
 # ---------------------------- #
 # PATH TRAVERSAL RELATED STUFF #
 # ---------------------------- #
@@ -328,6 +451,42 @@ def traverse_relative_path(relative_path, full_path):
         new_path = os.path.join(PATH_SEPARATOR, new_path + PATH_SEPARATOR, dir_name)
     return new_path
 
+def walk_files(path, recursive=False, extensions=None):
+    """
+    Lazily walk a directory with os.scandir().
+
+    Keyword arguments:
+    * path (str)                 --  the directory to walk
+    * recursive (bool)           --  whether or not to descend into sub-directories
+    * extensions (tuple or None) --  only yield files ending with one of these
+                                     (default: yield every file)
+
+    Return values:
+    * a generator of file paths relative to 'path' (e.g. 'folder/file.txt')
+    * unreadable sub-directories are silently skipped
+    """
+    pending_dirs = ['']
+    while pending_dirs:
+        relative_dir = pending_dirs.pop()
+        try:
+            with os.scandir(os.path.join(path, relative_dir)) as entries:
+                for entry in entries:
+                    relative_path = os.path.join(relative_dir, entry.name) if relative_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                pending_dirs.append(relative_path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if extensions is None or entry.name.endswith(extensions):
+                        yield relative_path
+        except OSError:
+            if not relative_dir:
+                raise
+
 def validate_os_path(file_name):
     """
     Check the validity of a given path.
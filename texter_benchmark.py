@@ -0,0 +1,264 @@
+# ------------------------------------- #
+# DBVG Texter Benchmark                 #
+# Reproducible converter measurements.  #
+# Written and tested with Python 3.10.8 #
+# ------------------------------------- #
+
+# native modules
+import os
+import re
+import sys
+import json
+import random
+import shutil
+import zipfile
+import platform
+import tempfile
+
+from time import perf_counter
+from statistics import median
+from collections import Counter
+from argparse import ArgumentParser
+from xml.sax.saxutils import escape
+
+# foreign modules
+from pypandoc import convert_file
+
+# Texter modules (its interactive session only starts when run directly)
+from Texter import docx_extractor
+
+# Shared with the SearTxT benchmark
+from benchmark import FILLER_WORDS
+from benchmark import percentile
+from benchmark import generate_line
+
+# ---------------- #
+# GLOBAL CONSTANTS #
+# ---------------- #
+
+VERSION = 1.0
+PROGRAM = 'Texter Benchmark'
+
+CONVERTERS = ('native', 'pandoc')
+
+# The smallest set of parts that Word, LibreOffice and pandoc accept as a DOCX file
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+DOCX_DOCUMENT_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+)
+DOCX_DOCUMENT_TAIL = '</w:body></w:document>'
+
+# ---------------------- #
+# SYNTHETIC CORPUS STUFF #
+# ---------------------- #
+
+def docx_paragraph(rng, line_length):
+    """Return the XML of a paragraph of roughly line_length characters, split into a few runs like Word does."""
+    words = generate_line(rng, line_length).split(' ')
+    runs = []
+    while words:
+        run_length = rng.randint(1, len(words))
+        text = escape(' '.join(words[:run_length]) + (' ' if run_length < len(words) else ''))
+        runs.append(f'<w:r><w:t xml:space="preserve">{text}</w:t></w:r>')
+        words = words[run_length:]
+    return f"<w:p>{''.join(runs)}</w:p>"
+
+
+def docx_table(rng, rows, columns):
+    """Return the XML of a table whose cells contain a single word each."""
+    cells = lambda: ''.join(f"<w:tc><w:p><w:r><w:t>{rng.choice(FILLER_WORDS)}</w:t></w:r></w:p></w:tc>" for _ in range(columns))
+    return f"<w:tbl>{''.join(f'<w:tr>{cells()}</w:tr>' for _ in range(rows))}</w:tbl>"
+
+
+def generate_corpus(corpus_dir, files, paragraphs, line_length, seed=0):
+    """
+    Write a reproducible synthetic corpus of .docx files (a table every 20 paragraphs).
+
+    Keyword arguments:
+    * corpus_dir (str)   --  the folder to write the files into
+    * files (int)        --  the number of files
+    * paragraphs (int)   --  the number of paragraphs of every file
+    * line_length (int)  --  the approximate length of every paragraph (in characters)
+    * seed (int)         --  the seed of the random generator (same seed, same corpus)
+
+    Return values:
+    * corpus (dict)  --  {'files', 'bytes'}
+    """
+    rng = random.Random(seed)
+    total_bytes = 0
+    for file_number in range(files):
+        body = []
+        for paragraph_number in range(paragraphs):
+            body.append(docx_paragraph(rng, line_length))
+            if paragraph_number % 20 == 19:
+                body.append(docx_table(rng, 4, 3))
+        file_path = os.path.join(corpus_dir, f"file{file_number:06d}.docx")
+        with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as docx_file:
+            docx_file.writestr('[Content_Types].xml', DOCX_CONTENT_TYPES)
+            docx_file.writestr('_rels/.rels', DOCX_RELATIONSHIPS)
+            docx_file.writestr('word/document.xml', DOCX_DOCUMENT_HEAD + ''.join(body) + DOCX_DOCUMENT_TAIL)
+        total_bytes += os.path.getsize(file_path)
+    return {'files' : files, 'bytes' : total_bytes}
+
+
+def describe_corpus(corpus_dir):
+    """Return the same statistics as generate_corpus() for an existing corpus."""
+    corpus = {'files' : 0, 'bytes' : 0}
+    for file_name in os.listdir(corpus_dir):
+        file_path = os.path.join(corpus_dir, file_name)
+        if file_name.endswith('.docx') and os.path.isfile(file_path):
+            corpus['files'] += 1
+            corpus['bytes'] += os.path.getsize(file_path)
+    return corpus
+
+# ------------------------- #
+# CONVERTER BENCHMARK STUFF #
+# ------------------------- #
+
+def convert_native(original_path, new_path):
+    """Convert a file like docx_handler() does. Return True if it had to go through pandoc."""
+    if docx_extractor(original_path, new_path):
+        return False
+    convert_file(original_path, 'plain', outputfile=new_path)
+    return True
+
+
+def convert_pandoc(original_path, new_path):
+    convert_file(original_path, 'plain', outputfile=new_path)
+    return True
+
+
+def text_words(file_path):
+    """Return the words of a converted file, regardless of how its lines were wrapped."""
+    with open(file_path, 'r', encoding='utf8') as text_file:
+        return Counter(re.findall(r'\w+', text_file.read()))
+
+
+def benchmark(corpus_dir, corpus, output_dir, converter, repeat, warmup):
+    """Convert every file of the corpus with a single converter and return its report."""
+    function = convert_native if converter == 'native' else convert_pandoc
+    docx_files = sorted(file_name for file_name in os.listdir(corpus_dir) if file_name.endswith('.docx'))
+    converter_dir = os.path.join(output_dir, converter)
+    os.makedirs(converter_dir, exist_ok=True)
+
+    def run():
+        pandoc_launches = 0
+        for file_name in docx_files:
+            new_path = os.path.join(converter_dir, f"{os.path.splitext(file_name)[0]}.txt")
+            pandoc_launches += function(os.path.join(corpus_dir, file_name), new_path)
+        return pandoc_launches
+
+    for _ in range(warmup):
+        run()
+    latencies = []
+    pandoc_launches = 0
+    for _ in range(repeat):
+        start_time = perf_counter()
+        pandoc_launches = run()
+        latencies.append(perf_counter() - start_time)
+
+    typical = median(latencies)
+    return {
+        'converter' : converter,
+        'pandoc_launches' : pandoc_launches,
+        'p50_s' : percentile(latencies, 0.5),
+        'p95_s' : percentile(latencies, 0.95),
+        'mb_per_s' : corpus['bytes'] / 1024 / 1024 / typical,
+        'files_per_s' : corpus['files'] / typical,
+    }
+
+
+def same_words(output_dir, converters):
+    """Count the files whose converted words are identical for every converter."""
+    if len(converters) < 2:
+        return None
+    first_dir = os.path.join(output_dir, converters[0])
+    identical = 0
+    for file_name in os.listdir(first_dir):
+        words = text_words(os.path.join(first_dir, file_name))
+        identical += all(text_words(os.path.join(output_dir, converter, file_name)) == words for converter in converters[1:])
+    return identical
+
+# ---------------------------- #
+# COMMAND LINE INTERFACE STUFF #
+# ---------------------------- #
+
+def parse_args(argv):
+    parser = ArgumentParser(description=f"{PROGRAM} ver {VERSION}: measure the Texter DOCX converters on a synthetic corpus")
+    parser.add_argument('--files', type=int, default=50, help='the number of files (default: 50)')
+    parser.add_argument('--paragraphs', type=int, default=200, help='the number of paragraphs of every file (default: 200)')
+    parser.add_argument('--line-length', type=int, default=300, help='the length of every paragraph (default: 300)')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the synthetic corpus (default: 0)')
+    parser.add_argument('--corpus-dir', help='keep the generated corpus in this folder (an existing, non-empty folder is converted as is)')
+    parser.add_argument('--converters', type=lambda value: tuple(item.strip() for item in value.split(',') if item.strip()), default=CONVERTERS, help='comma-separated converters (default: native,pandoc)')
+    parser.add_argument('--repeat', type=int, default=3, help='the measured runs of every converter (default: 3)')
+    parser.add_argument('--warmup', type=int, default=1, help='the unmeasured runs of every converter (default: 1)')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+
+    args = parser.parse_args(argv)
+    for converter in args.converters:
+        if converter not in CONVERTERS:
+            parser.error(f"unknown converter: {converter}")
+    if args.repeat < 1:
+        parser.error('--repeat must be greater than 0')
+    return args
+
+
+def main(argv):
+    args = parse_args(argv)
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix='texter-bench-')
+    output_dir = tempfile.mkdtemp(prefix='texter-bench-output-')
+    try:
+        os.makedirs(corpus_dir, exist_ok=True)
+        if os.listdir(corpus_dir):
+            # Never overwrite an existing folder, convert whatever it contains instead (the originals are kept)
+            corpus = describe_corpus(corpus_dir)
+        else:
+            corpus = generate_corpus(corpus_dir, args.files, args.paragraphs, args.line_length, args.seed)
+            corpus.update(seed=args.seed, paragraphs=args.paragraphs, line_length=args.line_length)
+
+        results = []
+        for converter in args.converters:
+            report = benchmark(corpus_dir, corpus, output_dir, converter, args.repeat, args.warmup)
+            results.append(report)
+            print(f"{converter:>7} p50 {report['p50_s']:.5f}s  {report['files_per_s']:.1f} files/s  {report['mb_per_s']:.2f} MB/s", file=sys.stderr)
+        identical = same_words(output_dir, args.converters)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    report = {
+        'version' : VERSION,
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'cpus' : os.cpu_count(),
+        'corpus' : corpus,
+        'repeat' : args.repeat,
+        'same_words' : identical,
+        'results' : results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))